@@ -0,0 +1,2 @@
+"""Бенчмарки и генератор синтетических данных: python -m benchmarks.run;
+проверки python -m benchmarks.startup и python -m benchmarks.low_memory"""
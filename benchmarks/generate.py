@@ -0,0 +1,161 @@
+"""Синтетические выгрузки WB для бенчмарков.
+
+    python -m benchmarks.generate <папка> [--rows 20000] [--articles 100] ...
+
+Создаёт <папка>/data/<компания>/<неделя>/{0,1,2}.xlsx с настоящими названиями
+колонок, configs/<компания>.json с себестоимостью и rate.xml в формате
+daily.xml НБКР (для RateProvider с локальным источником).
+"""
+import argparse
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregation import DJEM, WB_PROMOTION, BUYOUT_KINDS
+from utils.constants import (
+    COL_ARTICLE, COL_REASON, COL_PRICE, COL_ACQUIRING, COL_PAYOUT,
+    COL_DELIVERY, COL_KIND, COL_PENALTY, COL_STORAGE, COL_WITHHOLDING,
+    COL_ACCEPTANCE, COL_CAMPAIGN, COL_AD_SUM, COL_SELLER_ARTICLE, COL_STORAGE_SUM
+)
+
+# обоснования с весами, близкими к реальной детализации
+REASONS = {
+    "Продажа": 8, "Возврат": 1, "Логистика": 4, "Штраф": 1,
+    "Добровольная компенсация при возврате": 1, "Коррекция продаж": 1,
+    "Коррекция возвратов": 1, "Корректировка эквайринга": 1,
+    "Хранение": 1, "Удержание": 1, "Платная приемка": 1,
+}
+FINE_KINDS = [
+    "Штраф за нарушение правил", "Занижение фактических габаритов", "Подмена товара",
+    "Невыполненный заказ", "Нарушение маркировки", "Отсутствие товара в заказе",
+    "Самовыкуп", "Нарушение сроков поставки",
+]
+# колонки, которые отчёты не читают, но которые есть в выгрузке WB
+EXTRA_COLUMNS = [
+    "№", "Номер поставки", "Предмет", "Код номенклатуры", "Бренд", "Название",
+    "Размер", "Баркод", "Тип документа", "Дата заказа покупателем", "Дата продажи",
+    "Кол-во", "Цена розничная", "Вайлдберриз реализовал Товар (Пр)",
+    "Согласованный продуктовый дисконт, %", "Промокод, %", "Итоговая согласованная скидка, %",
+    "Размер снижения кВВ из-за рейтинга, %", "Вознаграждение Вайлдберриз (ВВ), без НДС",
+    "НДС с Вознаграждения Вайлдберриз", "Склад", "Страна", "Тип коробов", "Номер ГТД",
+    "Шк", "Srid",
+]
+RUB_RATE = 1.0812  # KGS за 1 RUB в rate.xml
+
+
+def generate_week(root, company, week, rows=20000, articles=100, fine_kinds=4, campaigns=None, seed=0):
+    """Пишет одну неделю data/<company>/<week>/{0,1,2}.xlsx, возвращает список артикулов"""
+    rng = np.random.default_rng(seed)
+    arts = [f"{company}-art-{i:04d}" for i in range(articles)]
+    fines = FINE_KINDS[:max(1, min(fine_kinds, len(FINE_KINDS)))]
+    campaigns = campaigns if campaigns is not None else articles * 3
+    week_dir = Path(root) / "data" / company / week
+    week_dir.mkdir(parents=True, exist_ok=True)
+
+    names = list(REASONS)
+    weights = np.array(list(REASONS.values()), dtype=float)
+    reason = rng.choice(names, rows, p=weights / weights.sum()).astype(object)
+    art = rng.choice(arts, rows).astype(object)
+    art[rng.random(rows) < 0.03] = None
+    art[(reason == "Хранение") | (reason == "Коррекция продаж")] = ""
+
+    kind = np.full(rows, None, dtype=object)
+    logistics = reason == "Логистика"
+    kind[logistics] = rng.choice(BUYOUT_KINDS, logistics.sum(), p=[0.6, 0.2, 0.2])
+    fine = reason == "Штраф"
+    kind[fine] = rng.choice(fines, fine.sum())
+    withheld = reason == "Удержание"
+    kind[withheld] = rng.choice([DJEM, WB_PROMOTION], withheld.sum())
+
+    sold = np.isin(reason, ["Продажа", "Возврат"])
+    price = np.where(sold, rng.uniform(300, 3000, rows).round(2), 0)
+
+    ledger = {col: rng.integers(0, 10**6, rows) for col in EXTRA_COLUMNS}
+    ledger.update({
+        COL_ARTICLE: art,
+        COL_REASON: reason,
+        COL_PRICE: price,
+        COL_ACQUIRING: (price * 0.02).round(2),
+        COL_PAYOUT: np.where(~logistics, (price * 0.7 + rng.uniform(0, 100, rows)).round(2), 0),
+        COL_DELIVERY: np.where(logistics, rng.uniform(30, 120, rows).round(2), 0),
+        COL_KIND: kind,
+        COL_PENALTY: np.where(fine, rng.uniform(100, 1000, rows).round(2), 0),
+        COL_STORAGE: np.where(reason == "Хранение", rng.uniform(10, 50, rows).round(2), 0),
+        COL_WITHHOLDING: np.where(withheld, rng.uniform(100, 500, rows).round(2), 0),
+        COL_ACCEPTANCE: np.where(reason == "Платная приемка", rng.uniform(10, 50, rows).round(2), 0),
+    })
+    pd.DataFrame(ledger).to_excel(week_dir / "0.xlsx", index=False)
+
+    # половина артикулов рекламируется, плюс общая кампания без артикула
+    names = [f"Кампания {a.upper()} поиск" for a in arts[: max(1, articles // 2)]] + ["Общая кампания"]
+    pd.DataFrame({
+        COL_CAMPAIGN: rng.choice(names, campaigns),
+        COL_AD_SUM: rng.uniform(100, 2000, campaigns).round(2),
+    }).to_excel(week_dir / "1.xlsx", index=False)
+
+    pd.DataFrame({
+        COL_SELLER_ARTICLE: [a.upper() for a in arts],
+        COL_STORAGE_SUM: rng.uniform(10, 500, len(arts)).round(2),
+    }).to_excel(week_dir / "2.xlsx", index=False)
+    return arts
+
+
+def write_config(root, company, articles, seed=0):
+    """configs/<company>.json с себестоимостью для всех артикулов"""
+    rng = np.random.default_rng(seed)
+    cfg_dir = Path(root) / "configs"
+    cfg_dir.mkdir(parents=True, exist_ok=True)
+    products = {a: {"unit_price": int(p)} for a, p in zip(articles, rng.integers(200, 1500, len(articles)))}
+    with open(cfg_dir / f"{company}.json", "w", encoding="utf-8") as f:
+        json.dump({"products": products}, f, ensure_ascii=False, indent=2)
+
+
+def write_rate_xml(path, kgs_per_rub=RUB_RATE, rate_date="01.01.2026"):
+    """daily.xml в формате НБКР с одним курсом RUB"""
+    value = f"{kgs_per_rub:.4f}".replace(".", ",")
+    xml = (
+        '<?xml version="1.0" encoding="windows-1251"?>'
+        f'<CurrencyRates Name="Daily Exchange Rates" Date="{rate_date}">'
+        f'<Currency ISOCode="RUB"><Nominal>1</Nominal><Value>{value}</Value></Currency>'
+        '</CurrencyRates>'
+    )
+    Path(path).write_bytes(xml.encode("cp1251"))
+
+
+def generate(root, companies=1, weeks=1, rows=20000, articles=100, fine_kinds=4, campaigns=None, seed=0):
+    """Полный набор: компании × недели, конфиги и rate.xml"""
+    root = Path(root)
+    for c in range(companies):
+        company = f"brand{c + 1}"
+        arts = []
+        for w in range(weeks):
+            start = date(2026, 1, 1) + timedelta(weeks=w)
+            week = f"{start:%d.%m}-{start + timedelta(days=6):%d.%m}"
+            arts = generate_week(root, company, week, rows, articles, fine_kinds, campaigns,
+                                 seed=seed + 100 * c + w)
+        write_config(root, company, arts, seed=seed + c)
+    write_rate_xml(root / "rate.xml")
+    return root
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Синтетические выгрузки WB для бенчмарков")
+    parser.add_argument("root", type=Path, help="куда писать data/, configs/ и rate.xml")
+    parser.add_argument("--companies", type=int, default=1)
+    parser.add_argument("--weeks", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=20000, help="строк в 0.xlsx")
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--fine-kinds", type=int, default=4, help=f"видов штрафов (до {len(FINE_KINDS)})")
+    parser.add_argument("--campaigns", type=int, default=None, help="строк в 1.xlsx (по умолчанию 3 × артикулы)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    generate(args.root, args.companies, args.weeks, args.rows, args.articles,
+             args.fine_kinds, args.campaigns, args.seed)
+    print(f"✅ Данные сгенерированы: {args.root}")
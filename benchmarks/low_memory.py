@@ -0,0 +1,93 @@
+"""Проверка --low-memory: детализация отпускается до расчёта detailed_report.
+
+    python -m benchmarks.low_memory [--rows 2000]
+
+Собирает синтетическую неделю через build_week с low_memory и без, по
+очереди (--threads 1) и графом в несколько потоков, и смотрит (weakref),
+жива ли ещё прочитанная таблица 0.xlsx, когда начинается расчёт
+detailed_report.xlsx. С low_memory её не должно держать ничто — ни
+датасет, ни результаты этапов графа. Код выхода 1, если держит.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import weakref
+from pathlib import Path
+
+from benchmarks.generate import generate
+
+
+def ledger_alive(root, low_memory, threads):
+    """Жива ли детализация в начале расчёта detailed_report (True/False)"""
+    import utils.dataset
+    import utils.detailed_pandas
+    from utils.build import build_week
+    from utils.planner import BuildOptions, WeekJob, report_period
+
+    read_ledger = utils.dataset.read_ledger
+    build_detailed_report = utils.detailed_pandas.build_detailed_report
+    probe = {}
+
+    def probed_read(path):
+        ledger = read_ledger(path)
+        probe["ref"] = weakref.ref(ledger)
+        return ledger
+
+    def probed_detailed(dataset):
+        gc.collect()
+        probe["alive"] = probe["ref"]() is not None
+        return build_detailed_report(dataset)
+
+    week_dir = next((root / "data").glob("*/*"))
+    options = BuildOptions(renderer="pillow", dpi=72, low_memory=low_memory, threads=threads)
+    job = WeekJob(week_dir.parent.name, week_dir, root / "reports" / week_dir.parent.name / week_dir.name,
+                  *report_period(), options)
+    utils.dataset.read_ledger = probed_read
+    utils.detailed_pandas.build_detailed_report = probed_detailed
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_week(job)
+    finally:
+        utils.dataset.read_ledger = read_ledger
+        utils.detailed_pandas.build_detailed_report = build_detailed_report
+    return probe["alive"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка, что --low-memory отпускает детализацию")
+    parser.add_argument("--rows", type=int, default=2000, help="строк в синтетической 0.xlsx")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from utils.currency import RateProvider, set_provider
+
+    args = parse_args(argv)
+    ok = True
+    print("Детализация в начале расчёта detailed_report:")
+    with tempfile.TemporaryDirectory(prefix="wb-lowmem-") as tmp:
+        root = Path(tmp)
+        generate(root, rows=args.rows, articles=20)
+        set_provider(RateProvider(source=root / "rate.xml", cache_path=None))
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            for threads in (1, 3):
+                for low_memory in (False, True):
+                    alive = ledger_alive(root, low_memory, threads)
+                    # без low_memory детализация нужна датасету — так проверяется и сама проба
+                    good = alive != low_memory
+                    ok &= good
+                    mode = "--low-memory" if low_memory else "обычный режим"
+                    print(f"  {'✅' if good else '❌'} {mode:<14} --threads {threads}: "
+                          f"{'жива' if alive else 'отпущена'}")
+        finally:
+            os.chdir(cwd)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
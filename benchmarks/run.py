@@ -0,0 +1,195 @@
+"""Бенчмарки этапов сборки отчёта на синтетических данных.
+
+    python -m benchmarks.run [--rows 20000] [--repeat 3] [--out results.json]
+                             [--baseline benchmarks/baseline.json] [--threshold 0.25]
+                             [--update-baseline]
+
+Каждый бенчмарк запускается repeat раз, в зачёт идёт лучшее время. Результат
+пишется в JSON и сравнивается с baseline: если этап стал медленнее больше чем
+на threshold (доля), процесс завершается с кодом 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.generate import generate
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def _quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def measure(fn, setup=None, repeat=3, warmup=1):
+    """Время fn(*setup()) repeat раз; setup не входит в замер.
+
+    warmup-прогоны не считаются: в них уходят ленивые импорты (matplotlib)
+    и первичная инициализация шрифтов.
+    """
+    for _ in range(warmup):
+        with _quiet():
+            fn(*(setup() if setup else ()))
+    runs = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        with _quiet():
+            start = time.perf_counter()
+            fn(*args)
+            runs.append(time.perf_counter() - start)
+    return {"best": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def run_benchmarks(root, repeat=3):
+    """Все бенчмарки на данных из root (generate); cwd — root"""
+    import pandas as pd
+
+    from utils.currency import RateProvider, set_provider
+    from utils.dataset import WeekDataset
+    from utils.pandas_part import build_report_dataframe
+    from utils.detailed_pandas import build_detailed_report
+    from utils.excel_formatting import format_and_save_report
+    from utils.detailed_excel_fromatting import format_and_save_detailed_report
+    from utils.SecondList import export_cards_png_from_excel
+    import main as app
+
+    set_provider(RateProvider(source=root / "rate.xml", cache_path=None))
+    week = next(p.parent for p in sorted((root / "data").rglob("0.xlsx")))
+    company = week.parent.name
+    out = root / "out"
+    out.mkdir(exist_ok=True)
+
+    loaded = WeekDataset.load(week, company)
+
+    def fresh_dataset():
+        # агрегаты считаются лениво — каждому замеру свой нетронутый набор
+        return (WeekDataset(loaded.path, loaded.ledger.copy(), loaded.ads, loaded.storage,
+                            loaded.catalog, loaded.company),)
+
+    with _quiet():
+        report_frames = build_report_dataframe(fresh_dataset()[0])
+        detailed = build_detailed_report(fresh_dataset()[0])
+        format_and_save_report(*[f.copy() if isinstance(f, pd.DataFrame) else f for f in report_frames],
+                               out / "report.xlsx")
+
+    def report_args():
+        frames = [f.copy() if isinstance(f, pd.DataFrame) else f for f in report_frames]
+        return (*frames, out / "report.xlsx")
+
+    def detailed_args():
+        return (detailed[0].copy(), detailed[1], detailed[2], out / "detailed_report.xlsx")
+
+    def clean_run():
+        # полный холодный запуск: без готовых отчётов и кэша разобранных Excel
+        shutil.rmtree(root / "reports", ignore_errors=True)
+        shutil.rmtree(root / ".cache", ignore_errors=True)
+        return ([],)  # main(argv): без флагов командной строки
+
+    benches = {
+        "build_report_dataframe": (build_report_dataframe, fresh_dataset),
+        "build_detailed_report": (build_detailed_report, fresh_dataset),
+        "format_and_save_report": (format_and_save_report, report_args),
+        "format_and_save_detailed_report": (format_and_save_detailed_report, detailed_args),
+        "export_cards_png_from_excel": (
+            export_cards_png_from_excel,
+            lambda: (out / "report.xlsx", out / "image_report.png", week.name, company),
+        ),
+        "main": (app.main, clean_run),
+    }
+    results = {}
+    for name, (fn, setup) in benches.items():
+        results[name] = measure(fn, setup, repeat)
+        print(f"  {name:<34} {results[name]['best'] * 1000:9.1f} мс")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Этапы, ставшие медленнее baseline больше чем на threshold"""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        if name not in results:
+            continue
+        ratio = results[name]["best"] / base["best"] if base["best"] else float("inf")
+        mark = "❌" if ratio > 1 + threshold else "✅"
+        print(f"  {mark} {name:<34} {ratio:6.2f}× (было {base['best'] * 1000:.1f} мс)")
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки сборки отчётов WB")
+    parser.add_argument("--rows", type=int, default=20000, help="строк в синтетическом 0.xlsx")
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--fine-kinds", type=int, default=4)
+    parser.add_argument("--campaigns", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="допустимое замедление относительно baseline, доля (0.25 = +25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="записать результат как новый baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    params = {"rows": args.rows, "articles": args.articles,
+              "fine_kinds": args.fine_kinds, "campaigns": args.campaigns}
+    out_path = args.out.resolve()
+    baseline_path = args.baseline.resolve()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="wb-bench-") as tmp:
+        root = Path(tmp)
+        generate(root, **params)
+        os.chdir(root)
+        try:
+            print(f"Бенчмарки: {params}, повторов — {args.repeat}")
+            results = run_benchmarks(root, args.repeat)
+        finally:
+            os.chdir(cwd)
+
+    payload = {
+        "meta": {
+            "params": params,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"✅ Результаты: {out_path}")
+
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"✅ Baseline обновлён: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("Baseline нет — сравнивать не с чем (запустите с --update-baseline)")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("meta", {}).get("params") != params:
+        print(f"⚠️ Baseline снят с другими параметрами: {baseline.get('meta', {}).get('params')}")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"❌ Регрессия больше {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""Бюджет времени запуска main.py.
+
+    python -m benchmarks.startup [--import-budget 0.3] [--noop-budget 0.5]
+
+Проверяет в отдельных процессах, что:
+  * import main не тянет тяжёлые модули (pandas, numpy, openpyxl, matplotlib,
+    requests, PIL) и укладывается в --import-budget секунд;
+  * запуск, когда все отчёты уже собраны, укладывается в --noop-budget секунд
+    и тоже обходится без тяжёлых модулей.
+Код выхода 1, если бюджет превышен.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.generate import generate
+
+REPO = Path(__file__).resolve().parent.parent
+HEAVY = ("pandas", "numpy", "openpyxl", "matplotlib", "requests", "PIL")
+
+
+def _run(code, cwd, repeat):
+    """Лучшее время и список тяжёлых модулей для python -c code"""
+    probe = code + f"\nimport sys, json; print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    env = {**os.environ, "PYTHONPATH": str(REPO)}
+    best, heavy = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", probe], cwd=cwd, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        best = min(best, time.perf_counter() - start)
+        heavy = json.loads(out.strip().splitlines()[-1])
+    return best, heavy
+
+
+def _build_reports(root):
+    """Один раз собирает отчёты в root, чтобы следующий запуск был холостым"""
+    from utils.currency import RateProvider, set_provider
+    import main as app
+
+    set_provider(RateProvider(source=root / "rate.xml", cache_path=None))
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            app.main(["--renderer", "pillow", "--dpi", "72"])
+    finally:
+        os.chdir(cwd)
+
+
+def check(name, seconds, heavy, budget):
+    ok = seconds <= budget and not heavy
+    mark = "✅" if ok else "❌"
+    extra = f", загружены: {', '.join(heavy)}" if heavy else ""
+    print(f"  {mark} {name:<22} {seconds * 1000:7.1f} мс (бюджет {budget * 1000:.0f} мс){extra}")
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка времени запуска main.py")
+    parser.add_argument("--import-budget", type=float, default=0.3, help="секунд на python -c 'import main'")
+    parser.add_argument("--noop-budget", type=float, default=0.5, help="секунд на запуск без работы")
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    ok = True
+    print("Запуск main.py:")
+
+    seconds, heavy = _run("import main", REPO, args.repeat)
+    ok &= check("import main", seconds, heavy, args.import_budget)
+
+    with tempfile.TemporaryDirectory(prefix="wb-startup-") as tmp:
+        root = Path(tmp)
+        generate(root, rows=500, articles=10)
+        _build_reports(root)
+        noop = f"import runpy, sys; sys.argv = ['main.py']; runpy.run_path({str(REPO / 'main.py')!r}, run_name='__main__')"
+        seconds, heavy = _run(noop, root, args.repeat)
+        ok &= check("холостой запуск", seconds, heavy, args.noop_budget)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,43 +1,205 @@
-from utils.pandas_part import build_report_dataframe
-from utils.excel_formatting import format_and_save_report
-from utils.SecondList import export_cards_png_from_excel
-from utils.detailed_pandas import build_detailed_report
-from utils.detailed_excel_fromatting import format_and_save_detailed_report
-from utils.currency import rub_to_kgs
-from utils.message import write_message
-
-from datetime import date, datetime, time, timedelta
+# здесь только лёгкие модули: pandas/openpyxl/matplotlib/requests импортируются
+# при первой сборке недели, и запуск без работы укладывается в доли секунды
+from utils.SecondList import RENDERERS
+from utils.io_utils import clear_cache
+from utils.trace import span, collect, write_trace, slowest_table
+from utils.planner import (
+    STAGE_THREADS, BuildOptions, WeekFilter, plan_jobs, backfill_jobs, format_plan, parse_bound
+)
+from utils.metrics_store import DB_PATH
+from utils.rollup import PERIODS, parse_period, run_rollups
+from utils.pdf_bundle import run_pdf_bundle
+from utils.build import build_week, backfill_week, run_job, run_pool
+from utils.watch import watch
 
 from pathlib import Path
+from fnmatch import fnmatch
+import argparse
+import os
+
+
+def main(argv=None):
+    """Разбирает аргументы (parse_args) и запускает нужный режим: PDF, сводные
+    отчёты, наблюдение за data/ или сборку выбранных недель."""
+    args = parse_args(argv)
+    if args.clear_cache:
+        print(f"Кэш очищен: удалено файлов — {clear_cache()}")
+        return
+
+    data_root = Path("data")
+    reports_root = Path("reports")
+    filters = WeekFilter.from_args(args)
+    options = BuildOptions.from_args(args)
+    workers = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    if args.pdf:
+        run_pdf_bundle(reports_root, filters)
+        return
+
+    if args.rollup or args.period:
+        run_rollups(args.rollup, args.period, filters, options.metrics_db or DB_PATH, reports_root, options)
+        return
+
+    if args.watch:
+        watch(data_root, reports_root, max(workers, 1), options, filters, args.poll, args.settle)
+        return
+
+    with span("plan"):
+        week_dirs = filters.discover(data_root)
+        if args.backfill:
+            jobs = backfill_jobs(week_dirs, data_root, reports_root, options)
+        else:
+            jobs = plan_jobs(week_dirs, data_root, reports_root, options, force=args.force, dry_run=args.dry_run)
+    if args.backfill:
+        print(f"Backfill базы метрик {options.metrics_db or DB_PATH}: недель — {len(jobs)}")
+    elif jobs or args.dry_run:
+        print(format_plan(jobs))
+    if not jobs or args.dry_run:
+        return
+
+    if args.profile_week:
+        for job in jobs:
+            if fnmatch(job.name, args.profile_week):
+                job.profile = Path(".cache") / "profiles" / f"{job.company}_{job.report_path.name}.prof"
+                break
+
+    task = backfill_week if args.backfill else build_week
+    if workers > 1 and len(jobs) > 1:
+        # курс запрашиваем один раз до запуска пула — воркеры возьмут его из кэша
+        from utils.currency import get_provider
+        try:
+            with span("rate_prefetch"):
+                get_provider().rate()
+        except RuntimeError:
+            pass
+        results = run_pool(jobs, task, min(workers, len(jobs)), args.max_in_flight or workers)
+    else:
+        results = [run_job(job, task) for job in jobs]
+
+    failed = [(job, err) for job, err, _ in results if err is not None]
+    for job, err in failed:
+        print(f"❌ {job.data_path}:\n{err}")
+    print(f"Готово: {len(results) - len(failed)} успешно, {len(failed)} с ошибками")
+
+    for job, _, _ in results:
+        if job.profile is not None and job.profile.exists():
+            print(f"cProfile {job.company}/{job.report_path.name}: {job.profile}")
+    if args.trace:
+        spans = collect() + [s for _, _, job_spans in results for s in job_spans]
+        write_trace(spans, args.trace)
+        print(slowest_table(spans))
+        print(f"Трассировка: {args.trace}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Еженедельные отчёты WB по папкам data/<компания>/<неделя>")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="число параллельных процессов (0 — по числу ядер), по умолчанию 1"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=STAGE_THREADS,
+        help=f"этапов одной недели параллельно (чтение файлов, Excel, PNG), 1 — по очереди; по умолчанию {STAGE_THREADS}"
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=None, metavar="N",
+        help="сколько недель одновременно в работе у пула процессов (по умолчанию = --jobs)"
+    )
+    parser.add_argument(
+        "--company", action="append", metavar="КОМПАНИЯ",
+        help="собирать только эту компанию (можно повторять)"
+    )
+    parser.add_argument(
+        "--since", type=parse_bound, metavar="ДАТА",
+        help="недели, начавшиеся не раньше даты (ГГГГ-ММ-ДД или дд.мм, как в имени папки)"
+    )
+    parser.add_argument(
+        "--until", type=parse_bound, metavar="ДАТА",
+        help="недели, начавшиеся не позже даты"
+    )
+    parser.add_argument(
+        "--week", metavar="ШАБЛОН",
+        help="шаблон имени папки недели, например '01.10*'"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="пересобрать выбранные недели целиком, даже если отчёты актуальны"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="только показать план сборки, ничего не собирая"
+    )
+    parser.add_argument(
+        "--renderer", choices=RENDERERS, default="matplotlib",
+        help="чем рисовать image_report.png: matplotlib (по умолчанию) или быстрый pillow"
+    )
+    parser.add_argument(
+        "--dpi", type=int, default=300,
+        help="разрешение image_report.png, по умолчанию 300"
+    )
+    parser.add_argument(
+        "--low-memory", action="store_true",
+        help="экономить память на больших детализациях: отпускать 0.xlsx сразу после агрегатов"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=None, metavar="N",
+        help="читать 0.xlsx кусками по N строк и сразу сворачивать в агрегаты — для очень больших выгрузок"
+    )
+    parser.add_argument(
+        "--memory-report", action="store_true",
+        help="печатать пик памяти по этапам (load, aggregate, format, render) и размеры таблиц"
+    )
+    parser.add_argument(
+        "--trace", nargs="?", const=".cache/trace.jsonl", default=None, metavar="FILE",
+        help="записать замеры этапов в JSON lines (по умолчанию .cache/trace.jsonl) и показать самые долгие"
+    )
+    parser.add_argument(
+        "--profile-week", metavar="КОМПАНИЯ/НЕДЕЛЯ",
+        help="снять cProfile одной недели (шаблон, например 'alura/01.10*') в .cache/profiles/"
+    )
+    parser.add_argument(
+        "--metrics-db", type=Path, default=DB_PATH, metavar="FILE",
+        help=f"база метрик по неделям и артикулам (SQLite), по умолчанию {DB_PATH}"
+    )
+    parser.add_argument(
+        "--no-metrics", action="store_true",
+        help="не записывать метрики в базу"
+    )
+    parser.add_argument(
+        "--backfill", action="store_true",
+        help="заполнить базу метрик по всем выбранным неделям из data/, не пересобирая отчёты"
+    )
+    parser.add_argument(
+        "--rollup", choices=PERIODS,
+        help="сводные отчёты за месяц или квартал из базы метрик, без разбора data/"
+    )
+    parser.add_argument(
+        "--period", type=parse_period, action="append", metavar="ПЕРИОД",
+        help="период сводного отчёта: ГГГГ-ММ или ГГГГ-Qn (можно повторять)"
+    )
+    parser.add_argument(
+        "--pdf", action="store_true",
+        help="сложить готовые отчёты недель в PDF (карточки и таблица по артикулам): "
+             "reports/<компания>/bundle.pdf и общий reports/bundle_all.pdf"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="не выходить: следить за data/ и собирать новые и изменённые недели в прогретых процессах"
+    )
+    parser.add_argument(
+        "--poll", type=float, default=2.0, metavar="СЕК",
+        help="--watch: как часто опрашивать data/, по умолчанию 2 с"
+    )
+    parser.add_argument(
+        "--settle", type=float, default=5.0, metavar="СЕК",
+        help="--watch: сколько файлы недели должны не меняться перед сборкой, по умолчанию 5 с"
+    )
+    parser.add_argument(
+        "--clear-cache", action="store_true",
+        help="очистить кэш разобранных Excel-файлов (.cache/excel) и выйти"
+    )
+    return parser.parse_args(argv)
 
-def main():
-    data_root = Path("data")    
-    for p in data_root.rglob("*"):
-        parts = p.parts
-        if (p.suffix == ".xlsx"):
-            company = parts[1]
-            st = str(p)
-            rs = st[5:-7]
-            rs = "reports/" + rs
-            report_path = Path(rs)
-            data_path = Path(st[:-7])            
-            if not report_path.exists():
-                today = date.today()
-                start_date = today - timedelta(days=today.weekday())
-                end_date = today + timedelta(days = 6)
-                
-                report_path.mkdir(parents=True, exist_ok=True)
-                result_df, fines_df, summary_df, pre_last_df, last_df, corr = build_report_dataframe(data_path)
-                format_and_save_report(result_df, fines_df, summary_df, pre_last_df, last_df, corr, report_path / "report.xlsx")
-                export_cards_png_from_excel(rs + "/report.xlsx", rs + "/image_report.png", str(report_path.name), str(company))
-                write_message(report_path / "message.txt", report_path / "report.xlsx", str(company), start_date, end_date)
-
-                
-                detailed_path = Path("data/" + rs) / "2.xlsx"
-                if detailed_path.exists():
-                    detailed_result_df, corr2, Buyout = build_detailed_report(data_path)
-                    format_and_save_detailed_report(detailed_result_df, corr2, Buyout, report_path / "detailed_report.xlsx")
-    
 
 if __name__ == "__main__":
     main()
@@ -1,2 +1,9 @@
 # utils/__init__.py
-from .excel_formatting import format_and_save_report  # имя файла и функции должны совпадать
+
+
+def __getattr__(name):
+    # лениво: импорт пакета utils не должен тянуть pandas/openpyxl
+    if name == "format_and_save_report":  # имя файла и функции должны совпадать
+        from .excel_formatting import format_and_save_report
+        return format_and_save_report
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
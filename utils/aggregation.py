@@ -0,0 +1,209 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+from utils.constants import (
+    COL_ARTICLE, COL_REASON, COL_PRICE, COL_ACQUIRING, COL_PAYOUT,
+    COL_DELIVERY, COL_KIND, COL_PENALTY, COL_STORAGE, COL_WITHHOLDING,
+    COL_ACCEPTANCE, COL_ARTICLE_KEY
+)
+
+# колонки, которые суммируются в разрезе артикул × обоснование для оплаты
+OPERATION_SUMS = [COL_PRICE, COL_ACQUIRING, COL_PAYOUT, COL_DELIVERY,
+                  COL_PENALTY, COL_STORAGE, COL_WITHHOLDING, COL_ACCEPTANCE]
+
+# колонки, которые суммируются в разрезе видов логистики/штрафов
+KIND_SUMS = [COL_PENALTY, COL_WITHHOLDING]
+
+DJEM = "Предоставление услуг по подписке «Джем»"
+WB_PROMOTION = "Оказание услуг «WB Продвижение»"
+
+# виды логистики, по которым считается выкуп
+TO_CLIENT_SALE = "К клиенту при продаже"
+FROM_CLIENT_RETURN = "От клиента при возврате"
+TO_CLIENT_CANCEL = "К клиенту при отмене"
+BUYOUT_KINDS = [TO_CLIENT_SALE, FROM_CLIENT_RETURN, TO_CLIENT_CANCEL]
+
+
+@dataclass
+class LedgerAggregates:
+    """Агрегаты нормализованной детализации (dataset.prepare_ledger) за один
+    проход groupby.
+
+    by_operation — индекс (ключ артикула, обоснование), колонка "rows" с
+    количеством строк и суммы OPERATION_SUMS. Строки без артикула/обоснования
+    тоже здесь (ключ NaN), поэтому сумма по таблице равна сумме по всей детализации.
+    by_kind — индекс вид логистики/штрафа, суммы KIND_SUMS.
+    fine_kinds — виды с ненулевыми штрафами в порядке появления.
+    labels — ключ артикула → написание из детализации (первое встреченное).
+    logistics — число строк BUYOUT_KINDS по ключам артикулов.
+    После них сама детализация для отчётов больше не нужна.
+    """
+    by_operation: pd.DataFrame
+    by_kind: pd.DataFrame
+    fine_kinds: pd.Index
+    labels: pd.Series
+    logistics: pd.DataFrame
+
+    def articles(self):
+        """Ключи артикулов в порядке появления в детализации"""
+        keys = self.by_operation.index.get_level_values(COL_ARTICLE_KEY)
+        return pd.Index(keys.dropna().unique(), dtype=object)
+
+    def article_labels(self, articles):
+        """Артикулы так, как они записаны в детализации — для вывода в отчёт"""
+        lookup = self.labels.to_dict()
+        return [lookup.get(a, a) for a in articles]
+
+    def per_article(self, column, reason, articles):
+        """Сумма колонки (или "rows") по артикулам для одного обоснования"""
+        ops = self.by_operation
+        part = ops[ops.index.get_level_values(COL_REASON) == reason]
+        part = part.droplevel(COL_REASON)[column]
+        return part.reindex(articles, fill_value=0)
+
+    def article_total(self, column, articles):
+        """Сумма колонки по артикулам без учёта обоснования"""
+        total = self.by_operation[column].groupby(level=COL_ARTICLE_KEY, sort=False, observed=True).sum()
+        return total.reindex(articles, fill_value=0)
+
+    def unkeyed_total(self, column):
+        """Сумма колонки по строкам без артикула"""
+        ops = self.by_operation
+        return ops.loc[ops.index.get_level_values(COL_ARTICLE_KEY).isna(), column].sum()
+
+    def reason_total(self, column, reason):
+        ops = self.by_operation
+        return ops.loc[ops.index.get_level_values(COL_REASON) == reason, column].sum()
+
+    def kind_total(self, column, kind):
+        if kind not in self.by_kind.index:
+            return 0
+        return self.by_kind.at[kind, column]
+
+    def total(self, column):
+        return self.by_operation[column].sum()
+
+
+def aggregate_ledger(df):
+    """Считает все агрегаты детализации (0.xlsx) за один проход"""
+    grouped = df.groupby([COL_ARTICLE_KEY, COL_REASON], sort=False, dropna=False, observed=True)
+    by_operation = grouped[OPERATION_SUMS].sum()
+    by_operation.insert(0, "rows", grouped.size())
+
+    by_kind = df.groupby(COL_KIND, sort=False, observed=True)[KIND_SUMS].sum()
+
+    kinds = df.loc[df[COL_PENALTY] != 0, COL_KIND].dropna().astype(object)
+    fine_kinds = pd.Index(kinds[kinds != ""].unique(), dtype=object)
+
+    labels = df.groupby(COL_ARTICLE_KEY, sort=False, observed=True)[COL_ARTICLE].first().astype(object)
+
+    logistics = (
+        df.groupby([COL_ARTICLE_KEY, COL_KIND], sort=False, observed=True).size()
+        .unstack(fill_value=0)
+        .reindex(columns=BUYOUT_KINDS, fill_value=0)
+    )
+
+    return LedgerAggregates(by_operation, by_kind, fine_kinds, labels, logistics)
+
+
+def _plain_index(index):
+    """Индекс с уровнями object вместо категорий: у кусков детализации категории
+    свои, и складывать их надо по значениям, а не по кодам"""
+    if index.nlevels == 1:
+        return index.astype(object)
+    return pd.MultiIndex.from_arrays(
+        [index.get_level_values(i).astype(object) for i in range(index.nlevels)], names=index.names
+    )
+
+
+def merge_aggregates(parts):
+    """Складывает агрегаты кусков детализации (aggregate_ledger по кускам
+    подряд) в агрегаты всей детализации. Порядок групп — порядок первого
+    появления, как у aggregate_ledger на целой таблице."""
+    parts = list(parts)
+    if len(parts) == 1:
+        return parts[0]
+
+    def fold(frames):
+        frames = [f.set_axis(_plain_index(f.index), axis=0) for f in frames]
+        levels = list(range(frames[0].index.nlevels))
+        return pd.concat(frames).groupby(level=levels, sort=False, dropna=False).sum()
+
+    by_operation = fold([p.by_operation for p in parts])
+    by_kind = fold([p.by_kind for p in parts])
+    fine_kinds = pd.Index(pd.concat([p.fine_kinds.to_series() for p in parts]).unique(), dtype=object)
+    labels = pd.concat([p.labels.set_axis(_plain_index(p.labels.index)) for p in parts])
+    labels = labels[~labels.index.duplicated()]
+    logistics = fold([p.logistics for p in parts]).reindex(columns=BUYOUT_KINDS, fill_value=0)
+    return LedgerAggregates(by_operation, by_kind, fine_kinds, labels, logistics)
+
+
+def aggregate_ledger_chunks(chunks):
+    """aggregate_ledger для детализации, прочитанной кусками (iter_excel_columns):
+    каждый кусок сворачивается в агрегаты и сразу вливается в общие, так что
+    в памяти одновременно только один кусок и уже сложенные суммы"""
+    total = None
+    for chunk in chunks:
+        part = aggregate_ledger(chunk)
+        total = part if total is None else merge_aggregates([total, part])
+    return total
+
+
+def article_metrics(agg, articles):
+    """Метрики по артикулам: продажи, выручка и эквайринг (продажи минус
+    возвраты), к перечислению (плюс добровольные компенсации) и логистика"""
+    def sold_minus_refunded(column):
+        return (agg.per_article(column, "Продажа", articles)
+                - agg.per_article(column, "Возврат", articles))
+
+    payout = (sold_minus_refunded(COL_PAYOUT)
+              + agg.per_article(COL_PAYOUT, "Добровольная компенсация при возврате", articles))
+
+    return pd.DataFrame({
+        "sales_qty": sold_minus_refunded("rows"),
+        "revenue_net": sold_minus_refunded(COL_PRICE),
+        "acquiring_fee": sold_minus_refunded(COL_ACQUIRING),
+        "payout_amount": payout,
+        "logistics_cost": agg.article_total(COL_DELIVERY, articles),
+    })
+
+
+def fine_metrics(agg):
+    """Суммы штрафов по видам"""
+    return agg.by_kind[COL_PENALTY].reindex(agg.fine_kinds, fill_value=0)
+
+
+def ledger_totals(agg):
+    """Общие суммы по детализации: хранение, Джем, WB Продвижение, приёмка
+    и корректировки"""
+    def payout(reason):
+        return agg.reason_total(COL_PAYOUT, reason)
+
+    return {
+        "warehouse_storage": agg.total(COL_STORAGE),
+        "djem": agg.kind_total(COL_WITHHOLDING, DJEM),
+        "ads_wb": agg.kind_total(COL_WITHHOLDING, WB_PROMOTION),
+        "acceptence_of_goods": agg.total(COL_ACCEPTANCE),
+        "correction": -payout("Добровольная компенсация при возврате"),
+        "correction_sales": -(payout("Коррекция продаж")
+                              + payout("Коррекция возвратов")
+                              - payout("Корректировка эквайринга")),
+    }
+
+
+def penalty_metrics(agg, keys, n):
+    """Штрафы по артикулам: собственные штрафы артикула плюс доля штрафов
+    без артикула (поровну на n артикулов)"""
+    return agg.article_total(COL_PENALTY, keys) + agg.unkeyed_total(COL_PENALTY) / n
+
+
+def buyout_counts(agg, articles):
+    """Числители и знаменатели выкупа по артикулам из кросс-таблицы
+    артикул × вид логистики: cnt_up — к клиенту при продаже минус возвраты,
+    cnt_cancel — к клиенту при отмене"""
+    counts = agg.logistics.reindex(index=articles, fill_value=0)
+    return pd.DataFrame({
+        "cnt_up": counts[TO_CLIENT_SALE] - counts[FROM_CLIENT_RETURN],
+        "cnt_cancel": counts[TO_CLIENT_CANCEL],
+    })
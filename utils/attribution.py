@@ -0,0 +1,101 @@
+from collections import deque
+from dataclasses import dataclass
+
+import pandas as pd
+
+from utils.constants import COL_CAMPAIGN, COL_AD_SUM
+
+
+class ArticleMatcher:
+    """Поиск всех артикулов-подстрок в названии кампании за один проход
+    (автомат Ахо — Корасик). Без учёта регистра, как str.contains(case=False)."""
+
+    def __init__(self, patterns):
+        self.patterns = [str(p).upper() for p in patterns]
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+        for idx, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                state = nxt
+            self._out[state].add(idx)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """Номера артикулов, которые встречаются в text"""
+        found = set(self._out[0])  # пустой артикул входит в любую строку
+        state = 0
+        for ch in str(text).upper():
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            found |= self._out[state]
+        return found
+
+
+@dataclass
+class AdAttribution:
+    """Расход рекламы по артикулам (RUB) и кампании, которые не удалось
+    однозначно отнести: unmatched — без артикула, ambiguous — на несколько."""
+    spend: pd.Series
+    unmatched: pd.DataFrame
+    ambiguous: pd.DataFrame
+
+    def summary(self):
+        return (f"кампаний без артикула — {len(self.unmatched)} "
+                f"({self.unmatched[COL_AD_SUM].sum():.2f} руб), "
+                f"на несколько артикулов — {len(self.ambiguous)}")
+
+    def details(self):
+        """Строки для вывода оператору: какие именно кампании не отнесены"""
+        lines = [f"  • без артикула: «{campaign}» — {amount:.2f} руб"
+                 for campaign, amount in self.unmatched.itertuples(index=False, name=None)]
+        lines += [f"  • на несколько артикулов: «{campaign}» — {amount:.2f} руб → {articles}"
+                  for campaign, amount, articles in self.ambiguous.itertuples(index=False, name=None)]
+        return lines
+
+
+def attribute_ad_spend(ads, articles):
+    """Относит кампании рекламного отчёта к артикулам.
+
+    Кампания засчитывается каждому артикулу, который входит в её название
+    (подстрока без учёта регистра); каждая уникальная кампания проверяется один раз.
+    """
+    articles = list(articles)
+    by_campaign = ads.groupby(ads[COL_CAMPAIGN].astype(str), sort=False)[COL_AD_SUM].sum()
+
+    matcher = ArticleMatcher(articles)
+    spend = [0.0] * len(articles)
+    unmatched, ambiguous = [], []
+    for campaign, amount in by_campaign.items():
+        found = matcher.find(campaign)
+        for idx in found:
+            spend[idx] += amount
+        if not found:
+            unmatched.append((campaign, amount))
+        elif len(found) > 1:
+            ambiguous.append((campaign, amount, ", ".join(articles[i] for i in sorted(found))))
+
+    return AdAttribution(
+        spend=pd.Series(spend, index=articles, dtype="float64"),
+        unmatched=pd.DataFrame(unmatched, columns=[COL_CAMPAIGN, COL_AD_SUM]),
+        ambiguous=pd.DataFrame(ambiguous, columns=[COL_CAMPAIGN, COL_AD_SUM, "Артикулы"]),
+    )
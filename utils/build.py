@@ -0,0 +1,242 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager, nullcontext
+import shutil
+import traceback
+
+from utils.SecondList import export_cards_png
+from utils.message import write_message
+from utils.memory import MemoryReport
+from utils.trace import span, week_context, collect, profiled
+from utils.catalog import get_catalog
+from utils.totals import read_report_totals
+from utils.manifest import (
+    REPORT, IMAGE, MESSAGE, DETAILED, ARTIFACTS, MANIFEST_NAME, input_hashes, record_artifacts
+)
+from utils.planner import week_start
+from utils.metrics_store import open_store, store_report, store_detailed
+from utils.pipeline import StageGraph
+
+# Сборка одной недели (WeekJob из планировщика) и запуск многих недель — по
+# очереди или в пуле процессов. pandas/openpyxl/matplotlib импортируются
+# внутри build_week: запуск без работы не должен их грузить.
+
+
+@contextmanager
+def stage(mem, name, **tags):
+    """Этап сборки недели: span для трассировки и учёт памяти"""
+    with span(name, **tags), mem.stage(name):
+        yield
+
+
+def build_week(job):
+    """Строит отчёты одной недели: data/<company>/<week> → reports/<company>/<week>.
+
+    Пересобирает только артефакты из job.stale и записывает их ключи в манифест.
+    Ошибка в одном артефакте не мешает остальным: собранные записываются в
+    манифест, а после этого поднимается RuntimeError со списком несобранных.
+    Настройки — job.options (BuildOptions); в базу метрик попадают
+    пересчитанные report.xlsx и detailed_report.xlsx.
+
+    Этапы объявлены графом (StageGraph): три входных файла читаются
+    одновременно, detailed_report.xlsx форматируется, пока рисуется PNG.
+    options.threads — сколько этапов недели идут параллельно (1 — по очереди;
+    с memory_report всегда по очереди, иначе пики памяти этапов смешаются).
+    options.chunk_rows — читать 0.xlsx кусками и сразу сворачивать в агрегаты
+    (для выгрузок в сотни тысяч строк: память ограничена размером куска).
+    """
+    from utils.dataset import WeekDataset, read_ledger, read_ads, read_storage, stream_ledger
+    from utils.pandas_part import build_report_dataframe
+    from utils.excel_formatting import format_and_save_report
+    from utils.detailed_pandas import build_detailed_report
+    from utils.detailed_excel_fromatting import format_and_save_detailed_report
+
+    company, data_path, report_path, stale, options = (job.company, job.data_path, job.report_path,
+                                                       job.stale, job.options)
+    report_path.mkdir(parents=True, exist_ok=True)
+    inputs = input_hashes(data_path)
+    catalog = get_catalog()
+    mem = MemoryReport(options.memory_report)
+    graph = StageGraph()
+
+    def read(name, reader):
+        def run():
+            with stage(mem, "load", file=name):
+                return reader(data_path)
+        return run
+
+    def read_0(path):
+        if options.chunk_rows:  # сразу агрегаты, а не сама детализация
+            return stream_ledger(path, options.chunk_rows)
+        return read_ledger(path)
+
+    def prepare(ledger, ads, storage):
+        if options.chunk_rows:
+            dataset = WeekDataset.from_frames(data_path, None, ads, storage, company, aggregates=ledger)
+        else:
+            dataset = WeekDataset.from_frames(data_path, ledger, ads, storage, company)
+        mem.frame("0.xlsx", dataset.ledger)
+        mem.frame("1.xlsx", dataset.ads)
+        mem.frame("2.xlsx", dataset.storage)
+        with stage(mem, "aggregate", artifact="ledger"):
+            dataset.articles  # агрегаты — до того, как их начнут читать два отчёта сразу
+            if options.low_memory:
+                dataset.release_ledger()
+        return dataset
+
+    def report_frames(dataset):
+        with stage(mem, "aggregate", artifact=REPORT):
+            frames = build_report_dataframe(dataset)
+        mem.frame("report", frames[0])
+        return frames
+
+    def save_report(frames):
+        with stage(mem, "format", artifact=REPORT):
+            return format_and_save_report(*frames, report_path / REPORT)
+
+    def render(totals):
+        with stage(mem, "render", artifact=IMAGE):
+            export_cards_png(totals, report_path / IMAGE, str(report_path.name), str(company),
+                             renderer=options.renderer, dpi=options.dpi)
+
+    def message(totals):
+        with span("format", artifact=MESSAGE):
+            write_message(report_path / MESSAGE, totals, str(company), job.start_date, job.end_date)
+
+    def detailed_frames(dataset, *after):
+        if dataset.storage is None:
+            return None
+        with stage(mem, "aggregate", artifact=DETAILED):
+            detailed = build_detailed_report(dataset)
+        mem.frame("detailed_report", detailed[0])
+        return detailed
+
+    def save_detailed(detailed):
+        if detailed is not None:
+            with stage(mem, "format", artifact=DETAILED):
+                format_and_save_detailed_report(*detailed, report_path / DETAILED)
+
+    if REPORT in stale or DETAILED in stale:
+        graph.add("0.xlsx", read("0.xlsx", read_0))
+        graph.add("1.xlsx", read("1.xlsx", read_ads))
+        graph.add("2.xlsx", read("2.xlsx", read_storage))
+        graph.add("dataset", prepare, "0.xlsx", "1.xlsx", "2.xlsx")
+    if REPORT in stale:
+        graph.add("report_frames", report_frames, "dataset")
+        graph.add(REPORT, save_report, "report_frames")
+        totals_stage = REPORT
+    elif IMAGE in stale or MESSAGE in stale:
+        graph.add("totals", lambda: read_report_totals(report_path / REPORT))
+        totals_stage = "totals"
+    if IMAGE in stale:
+        graph.add(IMAGE, render, totals_stage)
+    if MESSAGE in stale:
+        graph.add(MESSAGE, message, totals_stage)
+    if DETAILED in stale:
+        # расчёты двух отчётов — по очереди: они читают одни агрегаты, а индексы
+        # pandas строят движок поиска лениво и не потокобезопасно (да и GIL не
+        # даёт им ускориться); параллельно идут только чтение, Excel и PNG
+        after = ("report_frames",) if REPORT in stale else ()
+        graph.add("detailed_frames", detailed_frames, "dataset", *after)
+        graph.add(DETAILED, save_detailed, "detailed_frames")
+
+    errors = {}
+    # прочитанные таблицы (0.xlsx …) отпускаются сразу после "dataset": с
+    # low_memory неделю дальше держат только агрегаты
+    keep = {*ARTIFACTS, "dataset", "report_frames", "detailed_frames"}
+    results = graph.run(1 if options.memory_report else options.threads, errors=errors, keep=keep)
+
+    frames = results.get("report_frames")
+    detailed = results.get("detailed_frames")
+    articles = {}
+    if frames is not None:
+        articles[REPORT] = frames[0]["Артикул поставщика"].to_list()
+    if detailed is not None:
+        articles[DETAILED] = detailed[0]["Артикул поставщика"].to_list()
+    built = [a for a in ARTIFACTS if a in results and (a != DETAILED or detailed is not None)]
+
+    if options.metrics_db and (frames is not None or detailed is not None):
+        with span("store"):
+            store_week_metrics(options.metrics_db, company, report_path.name,
+                               week_start(report_path.name) or job.start_date,
+                               frames, detailed[0] if detailed is not None else None, results["dataset"])
+
+    if built:
+        record_artifacts(report_path, inputs, catalog, company, options.render, articles, built)
+    if options.memory_report:
+        print(mem.table(f"{company}/{report_path.name}"))
+    if errors:
+        missing = [a for a in ARTIFACTS if a in stale and a not in built]
+        details = "".join(f"\n--- этап {name}:\n" + "".join(traceback.format_exception(exc))
+                          for name, exc in errors.items())
+        raise RuntimeError(f"Не собраны: {', '.join(missing)}" + (f" (собраны: {', '.join(built)})" if built else "")
+                           + details)
+
+
+def store_week_metrics(metrics_db, company, week, period_start, frames, detailed_df, dataset):
+    """Записывает в базу метрик то, что посчитано (None — не пересчитывалось)"""
+    with open_store(metrics_db) as conn:
+        if frames is not None:
+            store_report(conn, company, week, period_start, frames)
+        if detailed_df is not None:
+            store_detailed(conn, company, week, period_start, detailed_df, dataset.aggregates)
+
+
+def backfill_week(job):
+    """Считает метрики недели из data/ и пишет их в базу, не трогая отчёты"""
+    from utils.dataset import WeekDataset
+    from utils.pandas_part import build_report_dataframe
+    from utils.detailed_pandas import build_detailed_report
+
+    week = job.report_path.name
+    with span("load"):
+        dataset = WeekDataset.load(job.data_path, job.company, chunk_rows=job.options.chunk_rows)
+    with span("aggregate", artifact=REPORT):
+        frames = build_report_dataframe(dataset)
+    detailed_df = None
+    if dataset.storage is not None:
+        with span("aggregate", artifact=DETAILED):
+            detailed_df = build_detailed_report(dataset)[0]
+    with span("store"):
+        store_week_metrics(job.options.metrics_db, job.company, week, week_start(week) or job.start_date,
+                           frames, detailed_df, dataset)
+
+
+def run_job(job, task=build_week):
+    """Запускает одну неделю (task(job) — сборка или backfill), не пропуская исключение наружу.
+
+    Возвращает (job, None | traceback, spans): spans — замеры этапов недели,
+    из воркера они так возвращаются в родительский процесс. Новая папка
+    отчёта удаляется, только если в ней не собралось ни одного артефакта
+    (нет манифеста); несобранное следующий запуск пересоберёт заново.
+    """
+    err = None
+    with week_context(job.company, job.report_path.name):
+        try:
+            with span("week"), (profiled(job.profile) if job.profile else nullcontext()):
+                task(job)
+        except Exception:
+            if job.fresh and not (job.report_path / MANIFEST_NAME).exists():
+                shutil.rmtree(job.report_path, ignore_errors=True)
+            err = traceback.format_exc()
+    return job, err, collect()
+
+
+def run_pool(jobs, task, workers, max_in_flight):
+    """Недели в пуле процессов, не больше max_in_flight одновременно отправленных.
+
+    Следующая неделя уходит в пул, только когда какая-то завершилась: очередь
+    из сотен недель не копится в пуле целиком, и в памяти одновременно не
+    больше max_in_flight недель с их данными и результатами.
+    """
+    results = []
+    queue = iter(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for job in queue:
+            in_flight.add(pool.submit(run_job, job, task))
+            if len(in_flight) >= max(max_in_flight, 1):
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                results.extend(f.result() for f in done)
+        for future in wait(in_flight).done:
+            results.append(future.result())
+    return results
@@ -0,0 +1,209 @@
+from dataclasses import dataclass, field
+from importlib.util import find_spec
+from pathlib import Path
+
+# цвета карточек
+GREY   = "#EDEDED"
+BEIGE  = "#F8E1D2"
+YELLOW = "#F8E79F"
+GREEN  = "#B3D09E"
+RED    = "#F4CCCC"
+GREEN_MAIN = "#8BD15C"
+title_color = "#000000"
+text_color  = "#222222"
+stroke_color = "#BFBFBF"
+table_header_color = "#D9D9D9"
+
+WEEKLY_TITLE = "Еженедельный отчёт"  # заголовок карточек; у сводных — свой (rollup.REPORT_TITLES)
+
+TABLE_COLUMNS = [
+    "Метрика",
+    "Выручка \n(продажи - \nвозвраты)",
+    "Комиссия WB",
+    "Комиссия \nэквайринга",
+    "Логистика",
+    "Хранение на \nскладе",
+    "Штрафы",
+    "Удержания \nплощадки",
+    "Приемка \nтовара",
+    "Реклама",
+    "Общая \nсебестоимость",
+    "Upsell-услуги \n(5%)",
+]
+
+
+@dataclass
+class CardLayout:
+    """Что нарисовать на странице карточек — общее для всех бэкендов.
+
+    cards — ряды карточек, каждая (заголовок, значение, цвет заливки).
+    """
+    title: str
+    table_columns: list = field(default_factory=lambda: list(TABLE_COLUMNS))
+    table_rows: list = field(default_factory=list)
+    cards: list = field(default_factory=list)
+
+
+def fmt_money(v):
+    if isinstance(v, (int, float)):
+        s = f"{v:,.2f}".replace(",", " ").replace(".", ",")
+        return f"{s}"
+    return str(v)
+
+
+def card_layout(totals, date_range_text, title_text, report_title=WEEKLY_TITLE):
+    """Раскладка страницы карточек по итогам отчёта (ReportTotals)"""
+    cm = [totals.revenue, totals.commission_wb, totals.acquiring, totals.logistics, totals.storage,
+          totals.fines, totals.djem_and_wb, totals.acceptance, totals.ads, totals.cogs, totals.upsell]
+
+    row_revenue = ["Выручка"] + [
+        fmt_money(totals.revenue) if i == 1 else "" for i in range(1, len(TABLE_COLUMNS))
+    ]
+    row_commissions = ["Комиссии"] + [
+        fmt_money(cm[i - 1]) if i > 1 else ""  for i in range(1, len(cm) + 1)
+    ]
+
+    cards = [
+        [("Выручка", f"{fmt_money(totals.revenue)} с", GREEN_MAIN)],
+        [("Штрафы", f"{fmt_money(totals.fines)}", GREY),
+         ("Логистика", f"{fmt_money(totals.logistics)}", GREY),
+         ("Хранение", f"{fmt_money(totals.storage)}", GREY)],
+        [("Приемка", f"{fmt_money(totals.acceptance)}", GREY),
+         ("Комиссия WB и\n эквайринг", f"{fmt_money(totals.commissions)}", GREY),
+         ("Джем + Реклама со\n счёта WB", f"{fmt_money(totals.djem_and_wb)}", GREY)],
+        [("Итого к оплате", f"{fmt_money(totals.to_bank)}", YELLOW)],
+        [("Реклама с\n собственного счёта", f"{fmt_money(totals.ads)}", BEIGE),
+         ("Общая себестоимость", f"{fmt_money(totals.cogs)}", BEIGE),
+         ("Upsell-услуги (5%)", f"{fmt_money(totals.upsell)}", BEIGE)],
+        [("Общие расходы", f"{fmt_money(totals.total_expenses)}", RED),
+         ("Чистая прибыль", f"{fmt_money(totals.profit)}", GREEN)],
+    ]
+
+    return CardLayout(
+        title=f"{title_text} {report_title} - {date_range_text}",
+        table_rows=[row_revenue, row_commissions],
+        cards=cards,
+    )
+
+
+def card_boxes(layout, h_gap=0.04, v_gap=0.05, card_scale=0.86, inner_gap_scale=1.6):
+    """Координаты карточек в долях области (0..1, ось y вверх):
+    список (x, y, ширина, высота, заголовок, значение, цвет)."""
+    rows = layout.cards
+    n_rows = len(rows)
+    max_cols = max(len(r) for r in rows)
+    base_row_h = (1.0 - (n_rows + 1) * v_gap) / n_rows
+    base_card_w = (1.0 - (max_cols - 1) * h_gap) / max_cols
+    row_h  = base_row_h * card_scale
+    card_w = base_card_w * card_scale
+
+    boxes = []
+    for r_idx, row in enumerate(rows):
+        strip_top = 1.0 - (r_idx) * (base_row_h + v_gap) - v_gap
+        y_bottom  = strip_top - row_h
+        cols_in_row = len(row)
+
+        eff_gap = h_gap * inner_gap_scale if cols_in_row > 1 else 0.0
+        row_block_w = cols_in_row * card_w + (cols_in_row - 1) * eff_gap
+
+        if row_block_w > 1.0:
+            shrink = (1.0 - (cols_in_row - 1) * eff_gap) / (cols_in_row * card_w)
+            shrink = max(0.6, min(1.0, shrink))
+            card_w_adj = card_w * shrink
+            row_block_w = cols_in_row * card_w_adj + (cols_in_row - 1) * eff_gap
+        else:
+            card_w_adj = card_w
+
+        x_left = (1.0 - row_block_w) / 2.0
+
+        for c_idx, (title, value, face) in enumerate(row):
+            x = x_left + c_idx * (card_w_adj + eff_gap)
+            boxes.append((x, y_bottom, card_w_adj, row_h, title, value, face))
+    return boxes
+
+
+# ---------- быстрый растровый бэкенд (Pillow) ----------
+
+A4_INCHES = (8.27, 11.69)
+TITLE_Y = 0.78
+VALUE_Y = 0.22
+
+
+def _font_path(bold):
+    """DejaVu Sans из поставки matplotlib — без импорта самого matplotlib"""
+    spec = find_spec("matplotlib")
+    if spec is None or spec.origin is None:
+        return None
+    name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    path = Path(spec.origin).parent / "mpl-data" / "fonts" / "ttf" / name
+    return path if path.exists() else None
+
+
+_fonts = {}
+
+
+def _font(size_px, bold=True):
+    from PIL import ImageFont
+
+    key = (size_px, bold)
+    if key not in _fonts:
+        path = _font_path(bold)
+        _fonts[key] = (ImageFont.truetype(str(path), size_px) if path
+                       else ImageFont.load_default(size_px))
+    return _fonts[key]
+
+
+def render_pillow(layout, out_png, dpi=300, title_fs=9, value_fs=12, table_fs=4, **boxes_kwargs):
+    """Рисует страницу A4 напрямую в Pillow: таблица сверху, карточки снизу"""
+    from PIL import Image, ImageDraw
+
+    def px(pt):
+        return max(1, round(pt * dpi / 72))
+
+    width, height = round(A4_INCHES[0] * dpi), round(A4_INCHES[1] * dpi)
+    margin = round(0.3 * dpi)
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+
+    # заголовок
+    y = margin
+    draw.text((width / 2, y), layout.title, font=_font(px(11)), fill=title_color, anchor="ma")
+    y += px(11) * 2
+
+    # таблица
+    n_cols = len(layout.table_columns)
+    col_w = (width - 2 * margin) / n_cols
+    head_h = px(table_fs) * 6
+    row_h = px(table_fs) * 3
+    line = max(1, px(0.5))
+    grid = [(layout.table_columns, table_header_color, head_h, True)]
+    grid += [(row, "#FFFFFF", row_h, False) for row in layout.table_rows]
+    for cells, face, h, bold in grid:
+        for c, text in enumerate(cells):
+            x0 = margin + c * col_w
+            draw.rectangle([x0, y, x0 + col_w, y + h], fill=face, outline="#000000", width=line)
+            draw.multiline_text((x0 + col_w / 2, y + h / 2), str(text), font=_font(px(table_fs), bold),
+                                fill=text_color, anchor="mm", align="center")
+        y += h
+
+    # карточки
+    top = y + margin / 2
+    area_w, area_h = width - 2 * margin, height - margin - top
+    pad = 0.02  # как boxstyle="round,pad=0.02" у matplotlib: рамка шире карточки
+    radius = round(pad * min(area_w, area_h))
+    stroke = max(1, px(1.2))
+    for x, yb, w, h, title, value, face in card_boxes(layout, **boxes_kwargs):
+        x0 = margin + x * area_w
+        y0 = top + (1.0 - yb - h) * area_h
+        x1, y1 = x0 + w * area_w, y0 + h * area_h
+        draw.rounded_rectangle([x0 - pad * area_w, y0 - pad * area_h, x1 + pad * area_w, y1 + pad * area_h],
+                               radius=radius, fill=face, outline=stroke_color, width=stroke)
+        cx = (x0 + x1) / 2
+        draw.multiline_text((cx, y1 - (y1 - y0) * TITLE_Y), title, font=_font(px(title_fs)),
+                            fill=title_color, anchor="mm", align="center")
+        draw.multiline_text((cx, y1 - (y1 - y0) * VALUE_Y), value, font=_font(px(value_fs)),
+                            fill=text_color, anchor="mm", align="center")
+
+    out_png = Path(out_png)
+    out_png.parent.mkdir(parents=True, exist_ok=True)
+    img.save(out_png, dpi=(dpi, dpi), optimize=False)
@@ -0,0 +1,89 @@
+from dataclasses import dataclass, field
+from numbers import Number
+from pathlib import Path
+import json
+
+CFG_ROOT = Path("configs")
+
+
+def normalize_article(article):
+    """Ключ артикула для поиска в справочнике: без пробелов по краям, в нижнем регистре"""
+    return str(article).strip().lower()
+
+
+@dataclass
+class Catalog:
+    """Справочник товаров из configs/<компания>.json.
+
+    by_company — {компания: {ключ артикула: цена}}; merged — все компании
+    вместе (при совпадении артикулов побеждает файл, идущий позже по имени).
+    mtimes — снимок файлов, по которому решается, нужна ли перезагрузка.
+    """
+    by_company: dict = field(default_factory=dict)
+    merged: dict = field(default_factory=dict)
+    mtimes: dict = field(default_factory=dict)
+    _indexes: dict = field(default_factory=dict, init=False, repr=False)
+
+    @classmethod
+    def load(cls, cfg_root=CFG_ROOT):
+        catalog = cls(mtimes=_snapshot(cfg_root))
+        for cfg_path in sorted(catalog.mtimes):
+            prices = _read_config(Path(cfg_path))
+            catalog.by_company[Path(cfg_path).stem] = prices
+            catalog.merged.update(prices)
+        return catalog
+
+    def _index(self, company):
+        own = self.by_company.get(company) if company is not None else None
+        if own is None:
+            return self.merged
+        if company not in self._indexes:
+            self._indexes[company] = {**self.merged, **own}
+        return self._indexes[company]
+
+    def price(self, article, company=None):
+        """Себестоимость единицы товара, 0 если артикула нет в справочнике"""
+        return self._index(company).get(normalize_article(article), 0)
+
+    def unit_prices(self, articles, company=None):
+        """Цены, выровненные по колонке/списку артикулов (pd.Series float64).
+
+        Сначала ищется в конфиге своей компании, затем во всех остальных.
+        """
+        import pandas as pd
+
+        keys = pd.Series(articles, dtype="string").str.strip().str.lower()
+        return keys.map(self._index(company)).astype("float64").fillna(0)
+
+
+def _snapshot(cfg_root):
+    return {str(p): p.stat().st_mtime_ns for p in sorted(Path(cfg_root).rglob("*.json"))}
+
+
+def _read_config(cfg_path):
+    """Читает и проверяет конфиг компании → {ключ артикула: цена}"""
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    products = data.get("products") if isinstance(data, dict) else None
+    if not isinstance(products, dict):
+        raise ValueError(f"В конфиге {cfg_path} нет словаря products")
+
+    prices = {}
+    for article, info in products.items():
+        price = info.get("unit_price", 0) if isinstance(info, dict) else None
+        if not isinstance(price, Number) or isinstance(price, bool) or price < 0:
+            raise ValueError(f"В конфиге {cfg_path} неверная цена у {article!r}: {info!r}")
+        prices[normalize_article(article)] = price
+    return prices
+
+
+_catalogs = {}
+
+
+def get_catalog(cfg_root=CFG_ROOT):
+    """Справочник процесса; перечитывается, только если изменились файлы configs/"""
+    key = str(Path(cfg_root).resolve())
+    catalog = _catalogs.get(key)
+    if catalog is None or catalog.mtimes != _snapshot(cfg_root):
+        catalog = _catalogs[key] = Catalog.load(cfg_root)
+    return catalog
@@ -1,2 +1,24 @@
 WB_COMMISSION_RATE = 0.245  # 24.5%
 UPSELL_RATE = 0.05          # 5%
+
+# колонки детализации WB (0.xlsx)
+COL_ARTICLE = "Артикул поставщика"
+COL_REASON = "Обоснование для оплаты"
+COL_PRICE = "Цена розничная с учетом согласованной скидки"
+COL_ACQUIRING = "Эквайринг/Комиссии за организацию платежей"
+COL_PAYOUT = "К перечислению Продавцу за реализованный Товар"
+COL_DELIVERY = "Услуги по доставке товара покупателю"
+COL_KIND = "Виды логистики, штрафов и корректировок ВВ"
+COL_PENALTY = "Общая сумма штрафов"
+COL_STORAGE = "Хранение"
+COL_WITHHOLDING = "Удержания"
+COL_ACCEPTANCE = "Платная приемка"
+
+# производная колонка, которая добавляется при загрузке детализации
+COL_ARTICLE_KEY = "article_key"   # артикул без пробелов в нижнем регистре
+
+# рекламный отчёт (1.xlsx) и отчёт по хранению (2.xlsx)
+COL_CAMPAIGN = "Кампания"
+COL_AD_SUM = "Сумма"
+COL_SELLER_ARTICLE = "Артикул продавца"
+COL_STORAGE_SUM = "Сумма хранения, руб"
@@ -1,10 +1,145 @@
-import requests, xml.etree.ElementTree as ET
+import contextlib
+import json
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from pathlib import Path
+import os
+import threading
+import time
 
-def rub_to_kgs(amount_rub: float) -> float:
-    xml = requests.get("https://www.nbkr.kg/XML/daily.xml", timeout=5).content
+import requests
+
+from utils.trace import span
+
+NBKR_URL = "https://www.nbkr.kg/XML/daily.xml"
+CACHE_PATH = Path(".cache") / "nbkr_rub.json"
+CACHE_TTL = timedelta(hours=12)
+
+
+def parse_rub_rate(xml):
+    """Курс KGS за 1 RUB и дата курса из daily.xml НБКР"""
     root = ET.fromstring(xml)
     rub = root.find(".//Currency[@ISOCode='RUB']")
+    if rub is None:
+        raise ValueError("В XML НБКР нет курса RUB.")
     nominal = int(rub.findtext("Nominal"))
     value = float(rub.findtext("Value").replace(",", "."))  # KGS за nominal RUB
-    kgs_per_rub = value / nominal
-    return round(amount_rub * kgs_per_rub, 2)
\ No newline at end of file
+    return value / nominal, root.get("Date", "")
+
+
+class RateProvider:
+    """Курс RUB→KGS: не больше одного запроса за запуск, кэш на диске с TTL,
+    при недоступности источника — последний известный курс.
+
+    source — URL, путь к локальному XML или функция, возвращающая XML (bytes).
+    """
+
+    def __init__(self, source=NBKR_URL, cache_path=CACHE_PATH, ttl=CACHE_TTL, timeout=5):
+        self.source = source
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.ttl = ttl
+        self.timeout = timeout
+        self._rate = None
+        self._rate_at = 0.0
+        self._lock = threading.Lock()  # этапы недели считают в нескольких потоках
+
+    def _fetch(self):
+        if callable(self.source):
+            return self.source()
+        src = str(self.source)
+        if src.startswith(("http://", "https://")):
+            resp = requests.get(src, timeout=self.timeout)
+            resp.raise_for_status()
+            return resp.content
+        return Path(src).read_bytes()
+
+    def _read_cache(self):
+        if self.cache_path is None or not self.cache_path.exists():
+            return None
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data["fetched_at"] = datetime.fromisoformat(data["fetched_at"])
+            float(data["kgs_per_rub"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return data
+
+    def _write_cache(self, rate, rate_date):
+        """Кэш пишут и воркеры пула, и воркеры --watch, иногда одновременно: у
+        каждого процесса свой временный файл. Не записался — не беда, сборка
+        идёт с уже полученным курсом."""
+        if self.cache_path is None:
+            return
+        tmp = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "kgs_per_rub": rate,
+                    "date": rate_date,
+                    "source": str(self.source) if not callable(self.source) else "callable",
+                    "fetched_at": datetime.now().isoformat(timespec="seconds"),
+                }, f, ensure_ascii=False, indent=2)
+            tmp.replace(self.cache_path)
+        except OSError as exc:
+            with contextlib.suppress(OSError):
+                tmp.unlink(missing_ok=True)
+            print(f"⚠️ Не удалось сохранить курс в {self.cache_path}: {exc}")
+
+    def rate(self):
+        """KGS за 1 RUB; в долгоживущем процессе (--watch) перечитывается раз в ttl"""
+        if self._rate is not None and time.monotonic() - self._rate_at < self.ttl.total_seconds():
+            return self._rate
+        with self._lock:
+            if self._rate is None or time.monotonic() - self._rate_at >= self.ttl.total_seconds():
+                self._rate = self._load_rate()
+                self._rate_at = time.monotonic()
+            return self._rate
+
+    def _load_rate(self):
+        cached = self._read_cache()
+        if cached is not None and datetime.now() - cached["fetched_at"] < self.ttl:
+            return float(cached["kgs_per_rub"])
+
+        try:
+            with span("rate_fetch"):
+                rate, rate_date = parse_rub_rate(self._fetch())
+        except (requests.RequestException, OSError, ET.ParseError, ValueError, TypeError) as exc:
+            if cached is None:
+                raise RuntimeError(f"Не удалось получить курс RUB/KGS: {exc}") from exc
+            print(f"⚠️ Курс НБКР недоступен ({exc}), используется курс от {cached.get('date')}")
+            return float(cached["kgs_per_rub"])
+
+        self._write_cache(rate, rate_date)
+        return rate
+
+    def convert(self, amount):
+        """Пересчёт RUB→KGS с округлением до копеек; принимает число или pd.Series"""
+        if hasattr(amount, "mul"):
+            return amount.mul(self.rate()).round(2)
+        return round(amount * self.rate(), 2)
+
+
+_provider = None
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        _provider = RateProvider()
+    return _provider
+
+
+def set_provider(provider):
+    """Подменяет источник курса (например, локальным XML для тестов)"""
+    global _provider
+    _provider = provider
+
+
+def rub_to_kgs(amount_rub: float) -> float:
+    return get_provider().convert(amount_rub)
+
+
+def convert(series):
+    return get_provider().convert(series)
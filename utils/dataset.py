@@ -0,0 +1,161 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+import gc
+
+import pandas as pd
+
+from utils.aggregation import aggregate_ledger, aggregate_ledger_chunks
+from utils.catalog import Catalog, get_catalog, CFG_ROOT
+from utils.constants import (
+    COL_ARTICLE, COL_REASON, COL_PRICE, COL_ACQUIRING, COL_PAYOUT,
+    COL_DELIVERY, COL_KIND, COL_PENALTY, COL_STORAGE, COL_WITHHOLDING,
+    COL_ACCEPTANCE, COL_ARTICLE_KEY,
+    COL_CAMPAIGN, COL_AD_SUM, COL_SELLER_ARTICLE, COL_STORAGE_SUM
+)
+from utils.io_utils import read_excel_columns, iter_excel_columns
+
+# колонки, которые реально используются в расчётах (остальные 50+ не читаются)
+LEDGER_SCHEMA = {
+    COL_ARTICLE: "object",
+    COL_REASON: "object",
+    COL_KIND: "object",
+    COL_PRICE: "float64",
+    COL_ACQUIRING: "float64",
+    COL_PAYOUT: "float64",
+    COL_DELIVERY: "float64",
+    COL_PENALTY: "float64",
+    COL_STORAGE: "float64",
+    COL_WITHHOLDING: "float64",
+    COL_ACCEPTANCE: "float64",
+}
+# нормализованная детализация (prepare_ledger): суммы — float64 без NaN,
+# артикулы и виды операций — категории
+LEDGER_MONEY = [COL_PRICE, COL_ACQUIRING, COL_PAYOUT, COL_DELIVERY, COL_PENALTY,
+                COL_STORAGE, COL_WITHHOLDING, COL_ACCEPTANCE]
+LEDGER_CATEGORIES = [COL_REASON, COL_KIND]
+
+ADS_SCHEMA = {COL_CAMPAIGN: "object", COL_AD_SUM: "float64"}
+STORAGE_SCHEMA = {COL_SELLER_ARTICLE: "object", COL_STORAGE_SUM: "float64"}
+
+
+@dataclass
+class WeekDataset:
+    """Входные данные одной недели: детализация (0.xlsx), реклама (1.xlsx),
+    хранение (2.xlsx) и справочник товаров (Catalog). Загружается один раз и передаётся
+    в build_report_dataframe и build_detailed_report."""
+    path: Path
+    ledger: pd.DataFrame
+    ads: pd.DataFrame | None = None
+    storage: pd.DataFrame | None = None
+    catalog: Catalog = field(default_factory=Catalog)
+    company: str | None = None
+
+    @classmethod
+    def load(cls, path, company=None, cfg_root=CFG_ROOT, low_memory=False, chunk_rows=None):
+        """low_memory — детализация отпускается сразу после агрегатов
+        (release_ledger); chunk_rows — детализация читается кусками и сразу
+        сворачивается в агрегаты (stream_ledger), целиком в памяти она не бывает"""
+        path = Path(path)
+        if chunk_rows:
+            return cls.from_frames(path, None, read_ads(path), read_storage(path), company, cfg_root,
+                                   aggregates=stream_ledger(path, chunk_rows))
+        dataset = cls.from_frames(path, read_ledger(path), read_ads(path), read_storage(path), company, cfg_root)
+        if low_memory:
+            dataset.release_ledger()
+        return dataset
+
+    @classmethod
+    def from_frames(cls, path, ledger, ads, storage, company=None, cfg_root=CFG_ROOT, aggregates=None):
+        """Из уже прочитанных таблиц: read_ledger/read_ads/read_storage
+        независимы и могут читаться параллельно. aggregates — готовые агрегаты
+        детализации (stream_ledger) вместо самой детализации."""
+        dataset = cls(Path(path), ledger, ads, storage, get_catalog(cfg_root), company)
+        if aggregates is not None:
+            dataset.aggregates = aggregates  # вместо cached_property
+        return dataset
+
+    @cached_property
+    def aggregates(self):
+        return aggregate_ledger(self.ledger)
+
+    def release_ledger(self):
+        """Считает агрегаты и отпускает детализацию: отчётам дальше нужны
+        только они, а сама таблица — самое большое, что держит неделя"""
+        self.aggregates
+        self.articles
+        self.ledger = None
+        gc.collect()
+
+    @cached_property
+    def articles(self):
+        """Ключи артикулов детализации (article_key) в порядке появления"""
+        return self.aggregates.articles()
+
+    def unit_prices(self, articles):
+        """Себестоимость единицы для артикулов, по справочнику своей компании"""
+        return self.catalog.unit_prices(articles, self.company)
+
+    @property
+    def ad_spend_total(self):
+        """Сумма по рекламному отчёту (RUB), 0 если 1.xlsx нет"""
+        return f_reklama(self.ads) if self.ads is not None else 0
+
+
+def f_reklama(df):
+    """Сумма по рекламному отчёту 1.xlsx"""
+    return df[COL_AD_SUM].sum()
+
+
+def read_ledger(path):
+    """Детализация 0.xlsx, нормализованная prepare_ledger"""
+    return prepare_ledger(read_excel_columns(Path(path) / "0.xlsx", LEDGER_SCHEMA))
+
+
+def stream_ledger(path, chunk_rows=50_000):
+    """Агрегаты детализации 0.xlsx, прочитанной кусками по chunk_rows строк:
+    пик памяти определяется размером куска, а не файла. Результат тот же,
+    что aggregate_ledger(read_ledger(path)), с точностью до округления сумм."""
+    path = Path(path) / "0.xlsx"
+    chunks = (prepare_ledger(chunk) for chunk in iter_excel_columns(path, LEDGER_SCHEMA, chunk_rows=chunk_rows))
+    agg = aggregate_ledger_chunks(chunks)
+    if agg is None:  # в листе только шапка
+        agg = aggregate_ledger(prepare_ledger(pd.DataFrame({col: pd.Series(dtype=dtype)
+                                                            for col, dtype in LEDGER_SCHEMA.items()})))
+    return agg
+
+
+def read_ads(path):
+    """Рекламный отчёт 1.xlsx или None, если его нет"""
+    ads_path = Path(path) / "1.xlsx"
+    return read_excel_columns(ads_path, ADS_SCHEMA) if ads_path.exists() else None
+
+
+def read_storage(path):
+    """Отчёт по хранению 2.xlsx или None, если его нет"""
+    storage_path = Path(path) / "2.xlsx"
+    return read_excel_columns(storage_path, STORAGE_SCHEMA) if storage_path.exists() else None
+
+
+def _categorical(s):
+    """Категория с категориями в порядке первого появления (NaN остаётся NaN)"""
+    categories = pd.Index(s.dropna().unique(), dtype=object)
+    return pd.Categorical(s, categories=categories)
+
+
+def prepare_ledger(df):
+    """Нормализует детализацию один раз при загрузке.
+
+    Артикул — без пробелов по краям (пустой → NaN), article_key — он же в
+    нижнем регистре; оба, как и виды операций, хранятся категориями.
+    Суммы — float64, нечисловые и пустые значения → 0.
+    """
+    article = df[COL_ARTICLE].astype("string").str.strip()
+    article = article.mask(article == "")
+    df[COL_ARTICLE] = _categorical(article.astype(object))
+    df[COL_ARTICLE_KEY] = _categorical(article.str.lower().astype(object))
+    for col in LEDGER_CATEGORIES:
+        df[col] = _categorical(df[col])
+    for col in LEDGER_MONEY:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64").fillna(0)
+    return df
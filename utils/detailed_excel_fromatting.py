@@ -1,8 +1,59 @@
+from math import isfinite
+
 import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, numbers
+from utils.excel_styles import (
+    header_fill, yellow_fill, bej_fill, blue_fill, green_fill, red_fill, bblue_fill,
+    number_00, DATA, TOTAL, PERCENT
+)
+from utils.report_writer import report_rows, write_sheet
+
+NUMBER_COLS = {"C", "E", "F", "G", "H", "J", "M", "N", "O", "P", "Q", "T", "V", "W"}
+PCT_HEADER_COLS = {"D", "I", "K", "L", "X", "U", "R"}  # колонки процентов — шапка без заливки
+RED_COLS = {"E", "F", "H", "J", "M", "N", "O", "Q", "T", "V"}
+
+# колонки, которые build_detailed_report отдаёт числом процентов (NaN — не посчитать)
+PCT_COLUMNS = ["Выручка %", "Логистика %", "Хранение % от собственного дохода",
+               "Хранение % от всей суммы", "Реклама %", "Себестоимость %",
+               "Чистая Прибыль %", "Выкуп"]
+
+
+def pct_text(value):
+    """12.3456 → "12.35%"; NaN/inf → пустая строка"""
+    if value is None or not isfinite(value):
+        return ""
+    return f"{round(float(value), 2)}%"
+
+
+def _header_style(col_letter):
+    return None if col_letter in PCT_HEADER_COLS else header_fill
+
+
+def _cell_style(kind, col_letter):
+    """(заливка, формат числа) ячейки detailed_report.xlsx"""
+    fill = None
+    if kind == DATA and col_letter in ("S", "Q"):
+        fill = yellow_fill
+    elif kind in (TOTAL, PERCENT):
+        if col_letter in ["A", "B"]:
+            fill = bej_fill
+        elif col_letter == "W":
+            fill = blue_fill
+        elif col_letter in ["C", "G", "P"]:
+            fill = green_fill
+        elif col_letter in RED_COLS:
+            fill = red_fill
+        elif col_letter == "Y" and kind == TOTAL:
+            fill = bblue_fill
+
+    number_format = number_00 if kind != PERCENT and col_letter in NUMBER_COLS else None
+    return fill, number_format
+
 
 def format_and_save_detailed_report(result_df, correction, Buyout, path):
+    result_df = result_df.copy()
+    for col in PCT_COLUMNS:
+        result_df[col] = result_df[col].map(pct_text)
+
     corrections = {"Артикул поставщика" : "Корректировка"}
     corrections["Выручка (продажи - возвраты)"] = correction[0]
     corrections["Комиссия WB"] = correction[1]
@@ -25,7 +76,7 @@ def format_and_save_detailed_report(result_df, correction, Buyout, path):
     totals["Чистая Прибыль"] = (totals["Сумма к перечислению"] - totals["Реклама"] - totals["Общая себестоимость"] -
                                 totals["Логистика"] - totals["Upsell-услуги (5%)"] - totals["Штрафы"] - 
                                 totals["Хранение на складе"] - totals["Джем"])
-    totals["Выкуп"] = f"{round(Buyout, 2)}%"
+    totals["Выкуп"] = pct_text(Buyout)
     totals_row = pd.DataFrame([{**{"Артикул поставщика": "Total:"}, **totals.to_dict()}])
     result_df = pd.concat([result_df, totals_row], ignore_index=True)
 
@@ -68,87 +119,7 @@ def format_and_save_detailed_report(result_df, correction, Buyout, path):
     # 5) Заменяем NaN только перед записью (чтобы не ломать типы)
     result_df = result_df.fillna("")
 
-    # 6) Сохранение
-    result_df.to_excel(path, index=False, sheet_name="Отчёт")
-
-    # 7) Лёгкое форматирование
-    wb = load_workbook(path)
-    ws = wb.active
-
-    header_fill = PatternFill("solid", fgColor="C0C0C0")
-    header_font = Font(bold=True, color="FF000000")
-    center = Alignment(horizontal="center", vertical="center")
-    thin = Side(border_style="thin", color="FF000000")
-    border = Border(left=thin, right=thin,top=thin,bottom=thin)
-
-    yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    bej_fill = PatternFill(start_color="F3DFD7", end_color="F3DFD7", fill_type="solid")
-    blue_fill = PatternFill(start_color="3EA6E8", end_color="3EA6E8", fill_type="solid")
-    green_fill = PatternFill(start_color="77DD77", end_color="77DD77", fill_type="solid")
-    red_fill = PatternFill(start_color="F9A6A6", end_color="F9A6A6", fill_type="solid")
-    bblue_fill = PatternFill(start_color="76B9CE", end_color="76B9CE", fill_type="solid")
-
-    for row in ws[f"S2:S{ws.max_row - 3}"]:
-        for cell in row:
-            cell.fill = yellow_fill
-            cell.border = border
-    for row in ws[f"Q2:Q{ws.max_row - 3}"]:
-        for cell in row:
-            cell.fill = yellow_fill
-            cell.border = border
-
-    ws.insert_rows(idx=ws.max_row - 2, amount=3)
-    ws.insert_rows(idx=ws.max_row - 1, amount=1)
-    ws.insert_rows(idx=ws.max_row, amount=1)
-
-    for cell in ws[1]:
-        col_letter = cell.column_letter
-
-        if col_letter not in ["D", "I", "K", "L", "X", "U", "R"]:
-            cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center
-        cell.border = border
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, max_col=ws.max_column):
-        for cell in row:
-            cell.alignment = center
-            cell.border = border
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row - 1, max_col=ws.max_column):
-        for cell in row:
-            col_letter = cell.column_letter
-            if col_letter in ["C", "E", "F", "G", "H", "J", "M", "N", "O", "P", "Q", "T", "V", "W"]:
-                cell.number_format = numbers.FORMAT_NUMBER_00
-            
-    ws.row_dimensions[1].height = 35
-    for column in ws.columns:
-        col_letter = column[0].column_letter
-        max_len = 0
-        for cell in column:
-            try:
-                max_len = max(max_len, len(str(cell.value)))
-            except Exception:
-                pass
-        ws.column_dimensions[col_letter].width = max(max_len, 10) + 2
-
-        if col_letter in ["A", "B"]:
-            ws[f"{col_letter}{ws.max_row}"].fill = bej_fill
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = bej_fill
-        elif col_letter == "W":
-            ws[f"{col_letter}{ws.max_row}"].fill = blue_fill
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = blue_fill
-        elif col_letter in ["C", "G", "P"]:
-            ws[f"{col_letter}{ws.max_row}"].fill = green_fill
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = green_fill
-        elif col_letter in ["E", "F", "H", "J", "M", "N", "O", "Q", "T", "V"]:
-            ws[f"{col_letter}{ws.max_row}"].fill = red_fill
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = red_fill
-        elif col_letter in ["Y"]:
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = bblue_fill
-
-    ws.freeze_panes = "D1"
-    
-    wb.save(path)
+    # 6) Раскладка листа и сохранение за один проход
+    write_sheet(path, list(result_df.columns), report_rows(result_df), _cell_style, _header_style)
 
     print("✅ detailed ")
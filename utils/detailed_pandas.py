@@ -1,37 +1,30 @@
-from pathlib import Path
-import json
-from utils.constants import WB_COMMISSION_RATE, UPSELL_RATE
-from utils.calculations import (
-    count_of_sales, sum_of_revenue, sum_of_ekv_commission,
-    f_amount_to_be_transfered, f_logistic,
-    f_storage_cost, f_penalties_amount, f_receiving_fee, f_ad_spend,
-    f_reklama, f_buyout_rate, f_djem, corr1, corr2, corr3
-)
-from utils.io_utils import read_excel
-from utils.currency import rub_to_kgs
+from utils.constants import WB_COMMISSION_RATE, UPSELL_RATE, COL_ACCEPTANCE
+from utils.attribution import attribute_ad_spend
+from utils.aggregation import article_metrics, ledger_totals, penalty_metrics, buyout_counts
+from utils.dataset import WeekDataset
+from utils.currency import convert
+from utils.catalog import normalize_article
+import numpy as np
 import pandas as pd
 
 
-def build_detailed_report(dt_path):
-    data_path = dt_path / "0.xlsx"
-    df_data = read_excel(data_path)
+def _pct(part, whole):
+    """part / whole × 100; где whole == 0 — NaN (в отчёте пустая ячейка)"""
+    part = np.asarray(part, dtype="float64")
+    whole = np.broadcast_to(np.asarray(whole, dtype="float64"), part.shape)
+    out = np.full(part.shape, np.nan)
+    np.divide(part, whole, out=out, where=whole != 0)
+    return out * 100
 
-    cfg_paths = Path("configs")
-    products = {}
 
-    df_storage = read_excel(dt_path / "2.xlsx")
+def build_detailed_report(dataset):
+    if not isinstance(dataset, WeekDataset):
+        dataset = WeekDataset.load(dataset)
 
-    for cfg_path in cfg_paths.rglob("*"):
-
-        with open(cfg_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        products = products | data["products"]
-
-    reklama_path = dt_path / "1.xlsx"
-    rekl = 0
-    if reklama_path.exists():
-        df_reklama = read_excel(reklama_path)
-        rekl = f_reklama(df_reklama)
+    df_storage = dataset.storage
+    df_reklama = dataset.ads
+    agg = dataset.aggregates
+    totals = ledger_totals(agg)
 
     articuls = (
         df_storage["Артикул продавца"]
@@ -39,94 +32,76 @@ def build_detailed_report(dt_path):
         .dropna()
         .unique()
     )
+    keys = [normalize_article(a) for a in articuls]  # в выгрузке WB артикул бывает числом
 
-    len_articuls_of_0 = len( 
-        (
-             df_data["Артикул поставщика"]
-             .replace("", pd.NA)
-             .dropna()
-             .unique()
-        )
-    )
+    len_articuls_of_0 = len(dataset.articles)
 
-    sales_qty, revenue_net, revenue_pct, commission_wb, acquiring_fee = [], [], [], [], []
-    payout_amount, logistics_cost, logistics_pct, storage_cost, storage_pct_of_own_income = [], [], [], [], []
-    storage_pct_of_total, penalties_amount, platform_withholdings, receiving_fee, transferred_to_bank = [], [], [], [], []
-    ad_spend,  ad_pct, unit_cost, total_cost, cost_pct = [], [], [], [], [] 
-    upsell_fee_5pct, net_profit, net_profit_pct, buyout_rate = [], [], [], []
-
-    for a in articuls:
-        articul = a.lower()
-        n_sales = count_of_sales(articul, df_data)
-        rev_net = sum_of_revenue(articul, df_data)
-        ack_sum = sum_of_ekv_commission(articul, df_data)
-        to_transfer = f_amount_to_be_transfered(articul, df_data)
-        logis = f_logistic(articul, df_data)
-        storage = rub_to_kgs(f_storage_cost(a, df_storage))
-        penalty = f_penalties_amount(articul, df_data, len_articuls_of_0)
-        withholdings = f_djem(df_data) / len(articuls)
-        rcv_fee = f_receiving_fee(articul, df_data)
-        trf_to_bank = rev_net - (rev_net * WB_COMMISSION_RATE) - ack_sum - logis - storage - penalty - withholdings - rcv_fee
-        ads = rub_to_kgs(f_ad_spend(articul, df_reklama))
-        cost = products.get(articul, {}).get("unit_price", 0)
-        profit = trf_to_bank - ads - (cost * n_sales) - (rev_net * UPSELL_RATE)
-
-        sales_qty.append(n_sales)
-        revenue_net.append(rev_net)
-        commission_wb.append(rev_net * WB_COMMISSION_RATE)
-        acquiring_fee.append(ack_sum)
-        payout_amount.append(to_transfer)
-        logistics_cost.append(logis)
-        storage_cost.append(storage)
-        penalties_amount.append(penalty)
-        platform_withholdings.append(round(withholdings, 2))
-        receiving_fee.append(rcv_fee)
-        transferred_to_bank.append(trf_to_bank)
-        ad_spend.append(ads)
-        unit_cost.append(cost)
-        total_cost.append(cost * n_sales)
-        upsell_fee_5pct.append(rev_net * UPSELL_RATE)
-        net_profit.append(profit)
-
-    for i in range(0, len(articuls)):
-        a = articuls[i].lower()
-
-        total_rev = sum(revenue_net)
-        total_storage = sum(storage_cost)
-
-        rev_pct = f"{round(revenue_net[i] / total_rev * 100, 2)}%"
-        logic_pct = f"{round(logistics_cost[i] / revenue_net[i] * 100, 2)}%"
-        stor_pct_income = f"{round(storage_cost[i] / revenue_net[i] * 100, 2)}%"
-        stor_pct_total = f"{round(storage_cost[i] / total_storage * 100, 2)}%"
-        ads_pct = f"{round(ad_spend[i] / revenue_net[i] * 100, 2)}%"
-        cost_pc = f"{round(total_cost[i] / revenue_net[i] * 100, 2)}%"
-        profit_pct = f"{round(net_profit[i]/revenue_net[i] * 100, 2)}%"
-        buyout_pct = f"{round(f_buyout_rate(a, df_data), 2)}%"
-
-        revenue_pct.append(rev_pct)
-        logistics_pct.append(logic_pct)
-        storage_pct_of_own_income.append(stor_pct_income)
-        storage_pct_of_total.append(stor_pct_total)
-        ad_pct.append(ads_pct)
-        cost_pct.append(cost_pc)
-        net_profit_pct.append(profit_pct)
-        buyout_rate.append(buyout_pct)
+    storage_by_articul = (
+        df_storage.groupby("Артикул продавца", sort=False)["Сумма хранения, руб"].sum()
+        .reindex(articuls, fill_value=0)
+    )
+    metrics = article_metrics(agg, keys)
+    penalties = penalty_metrics(agg, keys, len_articuls_of_0)
+    receiving = agg.article_total(COL_ACCEPTANCE, keys)
+    unit_costs = dataset.unit_prices(keys)
+    if df_reklama is not None:
+        attribution = attribute_ad_spend(df_reklama, keys)
+        ad_spend_rub = attribution.spend
+        if len(attribution.unmatched) or len(attribution.ambiguous):
+            print("\n".join([f"⚠️ Реклама: {attribution.summary()}", *attribution.details()]))
+    else:
+        ad_spend_rub = None
+    # Джем делится поровну между артикулами хранения; в пустом 2.xlsx их нет
+    djem_share = totals["djem"] / len(articuls) if len(articuls) else 0.0
+
+    # всё целыми колонками: рубли → сомы одним convert на колонку
+    sales_qty = metrics["sales_qty"].to_numpy()
+    revenue = metrics["revenue_net"].to_numpy(dtype="float64")
+    acquiring_fee = metrics["acquiring_fee"].to_numpy(dtype="float64")
+    logistics_cost = metrics["logistics_cost"].to_numpy(dtype="float64")
+    storage_cost = convert(storage_by_articul.astype("float64")).to_numpy()
+    penalties_amount = penalties.to_numpy(dtype="float64")
+    receiving_fee = receiving.to_numpy(dtype="float64")
+    ad_spend = (convert(ad_spend_rub).to_numpy() if ad_spend_rub is not None
+                else np.zeros(len(articuls)))
+    unit_cost = unit_costs.to_numpy(dtype="float64")
+
+    commission_wb = revenue * WB_COMMISSION_RATE
+    transferred_to_bank = (revenue - commission_wb - acquiring_fee - logistics_cost - storage_cost
+                           - penalties_amount - djem_share - receiving_fee)
+    total_cost = unit_cost * sales_qty
+    upsell_fee_5pct = revenue * UPSELL_RATE
+    net_profit = transferred_to_bank - ad_spend - total_cost - upsell_fee_5pct
+
+    # проценты и выкуп; в строку "xx.xx%" их переводит запись в Excel
+    counts = buyout_counts(agg, keys)
+    cnt_up = counts["cnt_up"].to_numpy()
+    cnt_dw = cnt_up + counts["cnt_cancel"].to_numpy()
+
+    revenue_pct = _pct(revenue, revenue.sum())
+    logistics_pct = _pct(logistics_cost, revenue)
+    storage_pct_of_own_income = _pct(storage_cost, revenue)
+    storage_pct_of_total = _pct(storage_cost, storage_cost.sum())
+    ad_pct = _pct(ad_spend, revenue)
+    cost_pct = _pct(total_cost, revenue)
+    net_profit_pct = _pct(net_profit, revenue)
+    buyout_rate = _pct(cnt_up, cnt_dw)
 
     result_df = pd.DataFrame({
-        "Артикул поставщика": articuls,
+        "Артикул поставщика": [str(a) for a in articuls],
         "Кол-во продаж": sales_qty,
-        "Выручка (продажи - возвраты)": revenue_net,
+        "Выручка (продажи - возвраты)": revenue,
         "Выручка %": revenue_pct,
         "Комиссия WB": commission_wb,
         "Комиссия эквайринга": acquiring_fee,
-        "Сумма к перечислению": payout_amount,
+        "Сумма к перечислению": metrics["payout_amount"].to_numpy(),
         "Логистика": logistics_cost,
         "Логистика %": logistics_pct,
         "Хранение на складе": storage_cost,
         "Хранение % от собственного дохода": storage_pct_of_own_income,
         "Хранение % от всей суммы": storage_pct_of_total,
         "Штрафы": penalties_amount,
-        "Джем": platform_withholdings,
+        "Джем": round(djem_share, 2),
         "Приемка товара": receiving_fee,
         "Перечислено банку": transferred_to_bank,
         "Реклама": ad_spend,
@@ -140,19 +115,10 @@ def build_detailed_report(dt_path):
         "Выкуп": buyout_rate
     })
 
-    corrections = [[-corr1("Добровольная компенсация при возврате", df_data)], 
-                   [-corr1("Добровольная компенсация при возврате", df_data)],
-                   [-(corr1("Коррекция продаж", df_data)+
-                     corr1("Коррекция возвратов", df_data)-
-                     corr1("Корректировка эквайринга", df_data))]]
-
-    cnt_up = 0
-    cnt_dw = 0
-    for articul in articuls:
-        a = articul.lower()
-        cnt_up += corr2(a, df_data)
-        cnt_dw += corr2(a, df_data) + corr3(a, df_data)
-    
-    Buyout = cnt_up / cnt_dw * 100
+    corrections = [[totals["correction"]],
+                   [totals["correction"]],
+                   [totals["correction_sales"]]]
+
+    Buyout = float(_pct(cnt_up.sum(), cnt_dw.sum()))
 
     return result_df, corrections, Buyout
@@ -1,9 +1,40 @@
 import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, numbers
+from utils.excel_styles import (
+    yellow_fill, bej_fill, blue_fill, green_fill, red_fill, number_00,
+    DATA, CORRECTION, TOTAL, PERCENT
+)
+from utils.report_writer import report_rows, write_sheet
+from utils.totals import ReportTotals
+
+NUMBER_COLS = {"C", "D", "E", "F", "G", "H", "J", "K", "L", "M", "N", "O", "P", "Q", "R", "S"}
+MERGED_COLS = ["J", "K", "L", "M", "N", "O", "S"]  # значения из summary_df/last_df — одно на весь блок
+
+
+def _cell_style(kind, col_letter):
+    """(заливка, формат числа) ячейки report.xlsx"""
+    fill = None
+    if kind == DATA and col_letter == "P":
+        fill = yellow_fill
+    elif kind == CORRECTION and col_letter == "O":
+        fill = yellow_fill
+    elif kind in (TOTAL, PERCENT):
+        if col_letter in ["A", "B"]:
+            fill = bej_fill
+        elif col_letter == "S":
+            fill = blue_fill
+        elif col_letter in ["C", "F", "N"]:
+            fill = green_fill
+        else:
+            fill = red_fill
 
-def format_and_save_report(result_df, fines_df, summary_df, pre_last_df, last_df, 
-                           correction,  path):
+    number_format = None
+    if kind in (DATA, CORRECTION, TOTAL) and col_letter in NUMBER_COLS:
+        number_format = number_00
+    return fill, number_format
+
+
+def _combine(result_df, fines_df, summary_df, pre_last_df, last_df, correction):
+    """Все блоки отчёта в одной таблице со строкой корректировки и итогами по колонкам"""
     # 1) Выравниваем длины и объединяем
     max_len = max(len(result_df), len(fines_df), len(summary_df), len(pre_last_df), len(last_df), 1)
     result_df  = result_df.reindex(range(max_len))
@@ -33,6 +64,18 @@ def format_and_save_report(result_df, fines_df, summary_df, pre_last_df, last_df
     # 3) TOTAL (учтёт и summary_df, т.к. всё уже вместе)
     totals = combined.select_dtypes(include="number").sum(numeric_only=True)
     totals["Реклама с собственного счёта"] -= correction[2]
+    return combined, totals
+
+
+def report_totals(result_df, fines_df, summary_df, pre_last_df, last_df, correction):
+    """Строка "Total:" отчёта (Series по колонкам) без записи report.xlsx"""
+    return _combine(result_df, fines_df, summary_df, pre_last_df, last_df, correction)[1]
+
+
+def format_and_save_report(result_df, fines_df, summary_df, pre_last_df, last_df, 
+                           correction,  path):
+    """Сохраняет report.xlsx и возвращает итоги (ReportTotals) для карточек и сообщения"""
+    combined, totals = _combine(result_df, fines_df, summary_df, pre_last_df, last_df, correction)
     totals_row = pd.DataFrame([{**{"Артикул поставщика": "Total:"}, **totals.to_dict()}])
     combined = pd.concat([combined, totals_row], ignore_index=True)
 
@@ -68,88 +111,10 @@ def format_and_save_report(result_df, fines_df, summary_df, pre_last_df, last_df
     # 5) Заменяем NaN только перед записью (чтобы не ломать типы)
     combined = combined.fillna("")
 
-    # 6) Сохранение
-    combined.to_excel(path, index=False, sheet_name="Отчёт")
-
-    # 7) Лёгкое форматирование
-    wb = load_workbook(path)
-    ws = wb.active
-
-    header_fill = PatternFill("solid", fgColor="C0C0C0")
-    header_font = Font(bold=True, color="FF000000")
-    center = Alignment(horizontal="center", vertical="center")
-    thin = Side(border_style="thin", color="FF000000")
-    border = Border(left=thin, right=thin,top=thin,bottom=thin)
-
-    yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    bej_fill = PatternFill(start_color="F3DFD7", end_color="F3DFD7", fill_type="solid")
-    blue_fill = PatternFill(start_color="3EA6E8", end_color="3EA6E8", fill_type="solid")
-    green_fill = PatternFill(start_color="77DD77", end_color="77DD77", fill_type="solid")
-    red_fill = PatternFill(start_color="F9A6A6", end_color="F9A6A6", fill_type="solid")
-
-    # закрашиваем диапазон B2:D4
-    for row in ws[f"P2:P{ws.max_row - 3}"]:
-        for cell in row:
-            cell.fill = yellow_fill
-            cell.border = border
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row - 1, max_col=ws.max_column):
-        for cell in row:
-            col_letter = cell.column_letter
-            if col_letter in ["C", "D", "E", "F", "G", "H", "J", "K", "L", "M", "N", "O", "P", "Q", "R", "S"]:
-                cell.number_format = numbers.FORMAT_NUMBER_00
-
-    ws.merge_cells(f"J2:J{ws.max_row-3}")
-    ws.merge_cells(f"K2:K{ws.max_row-3}")
-    ws.merge_cells(f"L2:L{ws.max_row-3}")
-    ws.merge_cells(f"M2:M{ws.max_row-3}")
-    ws.merge_cells(f"N2:N{ws.max_row-3}")
-    ws.merge_cells(f"O2:O{ws.max_row-3}")
-    ws.merge_cells(f"S2:S{ws.max_row-3}")
-
-
-    ws.insert_rows(idx=ws.max_row - 2, amount=3)
-    ws.insert_rows(idx=ws.max_row - 1, amount=1)
-    ws.insert_rows(idx=ws.max_row, amount=1)
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center
-        cell.border = border
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, max_col=ws.max_column):
-        for cell in row:
-            cell.alignment = center
-            cell.border = border
-
-    # автоширина
-    ws.row_dimensions[1].height = 35
-    for column in ws.columns:
-        col_letter = column[0].column_letter
-        max_len = 0
-        for cell in column:
-            try:
-                max_len = max(max_len, len(str(cell.value)))
-            except Exception:
-                pass
-        ws.column_dimensions[col_letter].width = max(max_len, 10) + 2
-
-        if col_letter in ["A", "B"]:
-            ws[f"{col_letter}{ws.max_row}"].fill = bej_fill
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = bej_fill
-        elif col_letter == "S":
-            ws[f"{col_letter}{ws.max_row}"].fill = blue_fill
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = blue_fill
-        elif col_letter in ["C", "F", "N"]:
-            ws[f"{col_letter}{ws.max_row}"].fill = green_fill
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = green_fill
-        else:
-            ws[f"{col_letter}{ws.max_row}"].fill = red_fill
-            ws[f"{col_letter}{ws.max_row - 2}"].fill = red_fill
-
-    ws[f"O{ws.max_row - 4}"].fill = yellow_fill
-
-    ws.freeze_panes = "D1"
+    # 6) Раскладка листа и сохранение за один проход
+    rows = report_rows(combined)
+    n_data = sum(1 for kind, _ in rows if kind == DATA)
+    merges = [f"{col}2:{col}{n_data + 1}" for col in MERGED_COLS]
+    write_sheet(path, list(combined.columns), rows, _cell_style, merges=merges)
 
-    wb.save(path)
+    return ReportTotals.from_row(totals)
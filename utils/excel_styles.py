@@ -0,0 +1,29 @@
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, numbers
+
+# общие стили report.xlsx и detailed_report.xlsx
+
+header_fill = PatternFill("solid", fgColor="C0C0C0")
+header_font = Font(bold=True, color="FF000000")
+center = Alignment(horizontal="center", vertical="center")
+thin = Side(border_style="thin", color="FF000000")
+border = Border(left=thin, right=thin,top=thin,bottom=thin)
+
+yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+bej_fill = PatternFill(start_color="F3DFD7", end_color="F3DFD7", fill_type="solid")
+blue_fill = PatternFill(start_color="3EA6E8", end_color="3EA6E8", fill_type="solid")
+green_fill = PatternFill(start_color="77DD77", end_color="77DD77", fill_type="solid")
+red_fill = PatternFill(start_color="F9A6A6", end_color="F9A6A6", fill_type="solid")
+bblue_fill = PatternFill(start_color="76B9CE", end_color="76B9CE", fill_type="solid")
+
+number_00 = numbers.FORMAT_NUMBER_00
+
+HEADER_HEIGHT = 35
+FREEZE_PANES = "D1"
+SHEET_NAME = "Отчёт"
+
+# виды строк итогового листа
+DATA = "data"
+BLANK = "blank"
+CORRECTION = "correction"
+TOTAL = "total"
+PERCENT = "percent"
@@ -1,11 +1,218 @@
 # utils/io_utils.py
-import pandas as pd
+import hashlib
+import os
 from pathlib import Path
 
-def read_excel(path: str):
-    return pd.read_excel(path)
+from utils.trace import span
+
+# pandas/numpy/openpyxl импортируются внутри функций: file_hash и clear_cache
+# нужны уже при планировании, когда отчёты могут вообще не собираться
+
+# кэш разобранных Excel: ключ — хэш содержимого файла и параметров чтения
+CACHE_DIR = Path(".cache") / "excel"
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512 МБ
+# версия формата кэша: увеличить при любом изменении того, как читатели
+# строят DataFrame (_read_columns, _locate_columns, _frame, _cast), иначе
+# подхватятся старые pickle
+CACHE_VERSION = 2
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_path(path, params):
+    import pandas as pd
+
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}".encode())
+    h.update(file_hash(path).encode())
+    h.update(repr(sorted(params.items())).encode())
+    h.update(pd.__version__.encode())  # pickle не переносим между версиями pandas
+    return CACHE_DIR / f"{h.hexdigest()}.pkl"
+
+
+def _cached(path, params, loader):
+    """Возвращает DataFrame из кэша или вызывает loader() и кладёт результат в кэш"""
+    import pandas as pd
+
+    cached = _cache_path(path, params)
+    if cached.exists():
+        try:
+            df = pd.read_pickle(cached)
+            os.utime(cached)  # mtime = время последнего использования (для LRU)
+            return df
+        except Exception:
+            cached.unlink(missing_ok=True)
+
+    df = loader()
+
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+    df.to_pickle(tmp, protocol=5)
+    tmp.replace(cached)
+    evict_cache()
+    return df
+
+
+def read_excel_columns(path, schema, optional=(), sheet_name=None, use_cache=True):
+    """Потоково читает из листа только колонки schema ({название: dtype}).
+
+    Остальные колонки не материализуются. Если в файле нет колонки из schema,
+    которой нет в optional, сразу бросает ValueError; отсутствующие optional
+    колонки заполняются NaN (целочисленные — нулём).
+    """
+    with span("read_excel", file=Path(path).name):
+        if not use_cache:
+            return _read_columns(path, schema, optional, sheet_name)
+        params = {"schema": schema, "optional": sorted(optional), "sheet_name": sheet_name}
+        return _cached(path, params, lambda: _read_columns(path, schema, optional, sheet_name))
+
+
+@span("parse_xlsx")
+def _read_columns(path, schema, optional, sheet_name):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name is not None else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        present, idx, width = _locate_columns(path, next(rows, ()), schema, optional)
+        values = {col: [] for col in present}
+        appends = [values[col].append for col in present]
+        for row in rows:
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            for append, i in zip(appends, idx):
+                append(row[i])
+    finally:
+        wb.close()
+
+    n_rows = len(values[present[0]]) if present else 0
+    # хвост пустых строк, которые openpyxl иногда отдаёт в конце листа
+    while n_rows and all(values[col][n_rows - 1] is None for col in present):
+        n_rows -= 1
+
+    return _frame(values, schema, n_rows)
+
+
+def _locate_columns(path, header, schema, optional):
+    """(колонки schema, которые есть в файле; их позиции; нужная ширина строки).
+    ValueError, если нет обязательной колонки."""
+    positions = {name: i for i, name in reversed(list(enumerate(header))) if name is not None}
+
+    missing = [col for col in schema if col not in positions and col not in optional]
+    if missing:
+        raise ValueError(f"В файле {path} нет колонок: {', '.join(missing)}")
+
+    present = [col for col in schema if col in positions]
+    idx = [positions[col] for col in present]
+    return present, idx, max(idx, default=-1) + 1
+
+
+def _frame(values, schema, n_rows):
+    import pandas as pd
+
+    data = {}
+    for col, dtype in schema.items():
+        column = values[col][:n_rows] if col in values else [None] * n_rows
+        data[col] = _cast(column, dtype)
+    return pd.DataFrame(data)
+
+
+def iter_excel_columns(path, schema, optional=(), sheet_name=None, chunk_rows=50_000):
+    """Как read_excel_columns, но отдаёт лист кусками по chunk_rows строк —
+    в памяти одновременно не больше одного куска (кэш не используется).
+
+    Пустые строки в конце листа отбрасываются, как и в read_excel_columns:
+    полностью пустые строки придерживаются, пока не встретится непустая.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name is not None else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        present, idx, width = _locate_columns(path, next(rows, ()), schema, optional)
+
+        values = {col: [] for col in present}
+        n_rows, blank = 0, 0
+        for row in rows:
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            cells = [row[i] for i in idx]
+            if all(v is None for v in cells):
+                blank += 1
+                continue
+            for _ in range(blank):
+                for col in present:
+                    values[col].append(None)
+            n_rows += blank + 1
+            blank = 0
+            for col, v in zip(present, cells):
+                values[col].append(v)
+            if n_rows >= chunk_rows:
+                yield _frame(values, schema, n_rows)
+                values = {col: [] for col in present}
+                n_rows = 0
+        if n_rows:
+            yield _frame(values, schema, n_rows)
+    finally:
+        wb.close()
+
+
+def _cast(values, dtype):
+    import numpy as np
+    import pandas as pd
+
+    s = pd.Series(values, dtype=object)
+    if dtype not in ("category", "string") and np.dtype(dtype).kind in "fiu":
+        s = pd.to_numeric(s, errors="coerce")
+        if np.dtype(dtype).kind != "f":
+            s = s.fillna(0)
+        return s.astype(dtype)
+    s = s.where(s.notna(), np.nan)
+    return s if dtype in (object, "object") else s.astype(dtype)
+
+
+def evict_cache(max_bytes=CACHE_MAX_BYTES):
+    """Удаляет давно не использованные файлы кэша, пока он не влезет в max_bytes"""
+    if not CACHE_DIR.exists():
+        return
+    entries = []
+    for p in CACHE_DIR.glob("*.pkl"):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        p.unlink(missing_ok=True)
+        total -= size
+
+
+def clear_cache():
+    """Полностью очищает кэш разобранных Excel; возвращает число удалённых файлов"""
+    if not CACHE_DIR.exists():
+        return 0
+    removed = 0
+    for p in CACHE_DIR.iterdir():
+        if p.is_file():
+            p.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
 
 def write_report(result_df):
+    import pandas as pd
+
     out_path = Path("reports") / "report.xlsx"
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
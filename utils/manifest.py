@@ -0,0 +1,123 @@
+import hashlib
+import json
+from pathlib import Path
+
+from utils.constants import COL_ARTICLE
+from utils.io_utils import file_hash, read_excel_columns
+
+# .manifest.json в папке отчёта недели: для каждого артефакта — ключ,
+# посчитанный из хэшей входных файлов, нужных цен из configs/ и настроек.
+# Артефакт пересобирается, только если его ключ изменился.
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 1  # увеличить, если меняется формат/расчёт отчётов
+
+REPORT = "report.xlsx"
+IMAGE = "image_report.png"
+MESSAGE = "message.txt"
+DETAILED = "detailed_report.xlsx"
+ARTIFACTS = (REPORT, IMAGE, MESSAGE, DETAILED)
+
+INPUTS = ("0.xlsx", "1.xlsx", "2.xlsx")
+
+
+def input_hashes(data_path):
+    """Хэши содержимого входных файлов недели (None — файла нет)"""
+    data_path = Path(data_path)
+    return {name: file_hash(data_path / name) if (data_path / name).exists() else None
+            for name in INPUTS}
+
+
+def unit_prices(catalog, company, articles):
+    """Цены, которые отчёт возьмёт из справочника для этих артикулов"""
+    return {a: catalog.price(a, company) for a in articles}
+
+
+def report_articles(path):
+    """Артикулы уже собранного report.xlsx или detailed_report.xlsx — те, по
+    которым брались цены: колонка артикулов до первой пустой строки (ниже
+    идут «Корректировка», «Total:» и «Percentage:»)"""
+    column = read_excel_columns(path, {COL_ARTICLE: "object"}, sheet_name="Отчёт", use_cache=False)[COL_ARTICLE]
+    articles = []
+    for value in column:
+        if value is None or value != value or str(value).strip() == "":  # None или NaN
+            break
+        articles.append(str(value))
+    return articles
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def artifact_keys(inputs, prices, options):
+    """Ключи всех артефактов недели.
+
+    prices — {артефакт: {артикул: цена}} для report.xlsx и detailed_report.xlsx;
+    options — настройки рендера карточек (renderer, dpi).
+    """
+    report = _digest(MANIFEST_VERSION, REPORT, inputs["0.xlsx"], inputs["1.xlsx"], prices.get(REPORT, {}))
+    keys = {
+        REPORT: report,
+        IMAGE: _digest(MANIFEST_VERSION, IMAGE, report, options.get("renderer"), options.get("dpi")),
+        MESSAGE: _digest(MANIFEST_VERSION, MESSAGE, report),
+    }
+    if inputs["2.xlsx"] is not None:
+        keys[DETAILED] = _digest(MANIFEST_VERSION, DETAILED, inputs["0.xlsx"], inputs["1.xlsx"],
+                                 inputs["2.xlsx"], prices.get(DETAILED, {}))
+    return keys
+
+
+def load_manifest(report_path):
+    path = Path(report_path) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(report_path, manifest):
+    path = Path(report_path) / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    tmp.replace(path)
+
+
+def current_keys(manifest, inputs, catalog, company, options):
+    """Ключи артефактов при текущих входах — с ценами тех же артикулов,
+    что попали в отчёты при прошлой сборке"""
+    artifacts = (manifest or {}).get("artifacts", {})
+    prices = {name: unit_prices(catalog, company, artifacts.get(name, {}).get("articles", []))
+              for name in (REPORT, DETAILED)}
+    return artifact_keys(inputs, prices, options)
+
+
+def stale_artifacts(report_path, inputs, catalog, company, options):
+    """Какие артефакты недели нужно пересобрать"""
+    manifest = load_manifest(report_path)
+    keys = current_keys(manifest, inputs, catalog, company, options)
+    artifacts = (manifest or {}).get("artifacts", {})
+    return {name for name, key in keys.items()
+            if artifacts.get(name, {}).get("key") != key or not (Path(report_path) / name).exists()}
+
+
+def record_artifacts(report_path, inputs, catalog, company, options, articles, built):
+    """Обновляет манифест после сборки.
+
+    articles — {артефакт: артикулы, по которым брались цены}; built — что
+    было собрано сейчас (остальные записи остаются как были).
+    """
+    manifest = load_manifest(report_path) or {"version": MANIFEST_VERSION, "artifacts": {}}
+    artifacts = manifest.setdefault("artifacts", {})
+    for name, arts in articles.items():
+        artifacts.setdefault(name, {})["articles"] = list(arts)
+    keys = current_keys(manifest, inputs, catalog, company, options)
+    for name in built:
+        if name in keys:
+            artifacts.setdefault(name, {})["key"] = keys[name]
+    manifest["inputs"] = inputs
+    manifest["version"] = MANIFEST_VERSION
+    save_manifest(report_path, manifest)
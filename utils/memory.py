@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import sys
+import tracemalloc
+
+# этапы сборки недели, по которым ведётся учёт памяти
+STAGES = ("load", "aggregate", "format", "render")
+
+
+def frame_bytes(df):
+    """Размер DataFrame в памяти вместе со строками в object-колонках"""
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+def max_rss():
+    """Пиковый RSS процесса в байтах (0, если платформа не сообщает)"""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _mb(n):
+    return f"{n / 2**20:.1f} МБ"
+
+
+@dataclass
+class MemoryReport:
+    """Пик памяти по этапам (tracemalloc) и размеры DataFrame.
+
+    Выключенный отчёт ничего не измеряет: tracemalloc заметно замедляет
+    pandas/openpyxl, поэтому включается только по флагу --memory-report.
+    """
+    enabled: bool = False
+    peaks: dict = field(default_factory=dict)
+    frames: dict = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+            if started:
+                tracemalloc.stop()
+
+    def frame(self, name, df):
+        if self.enabled:
+            self.frames[name] = frame_bytes(df)
+
+    def table(self, title):
+        lines = [f"📊 Память {title}:"]
+        for name in STAGES:
+            if name in self.peaks:
+                lines.append(f"  {name:<10} пик {_mb(self.peaks[name])}")
+        for name, size in self.frames.items():
+            lines.append(f"  {name:<24} {_mb(size)}")
+        rss = max_rss()
+        if rss:
+            lines.append(f"  процесс (max RSS)        {_mb(rss)}")
+        return "\n".join(lines)
@@ -0,0 +1,278 @@
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from utils.catalog import normalize_article
+
+# Локальная база метрик по неделям: всё, что считается для report.xlsx и
+# detailed_report.xlsx, в длинном формате (одна строка — одно значение), чтобы
+# вопросы "выручка за 8 недель" не требовали заново разбирать старые Excel.
+#   weeks           — собранные недели и дата их начала
+#   article_metrics — значения по артикулам: компания, неделя, источник, артикул, метрика
+#   week_metrics    — итоги недели (строка "Total:"), штрафы по видам и числители выкупа
+#   articles        — как артикул подписан в отчёте-источнике (ключ — normalize_article)
+# Источник (source): "report", "detailed", "fines" или "correction". Метрики
+# названы как колонки отчётов; cnt_up / cnt_cancel — продажи и отмены для
+# пересчёта выкупа; correction — корректировки недели (ledger_totals и реклама в руб.).
+# sqlite3 импортируется внутри функций — модуль нужен main.py уже при запуске.
+DB_PATH = Path("reports") / "metrics.sqlite"
+
+REPORT_SOURCE = "report"
+DETAILED_SOURCE = "detailed"
+FINES_SOURCE = "fines"
+CORRECTION_SOURCE = "correction"
+CORRECTIONS = ("correction", "correction_sales", "ads_rub")  # порядок как в build_report_dataframe
+
+BUYOUT_UP = "cnt_up"
+BUYOUT_CANCEL = "cnt_cancel"
+
+# у этих колонок нет смысла в сумме за неделю/период
+NOT_SUMMED = ("Себестоимость единицы товара",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    company      TEXT NOT NULL,
+    week         TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    updated_at   TEXT NOT NULL,
+    PRIMARY KEY (company, week)
+);
+CREATE TABLE IF NOT EXISTS article_metrics (
+    company      TEXT NOT NULL,
+    week         TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    source       TEXT NOT NULL,
+    article      TEXT NOT NULL,
+    metric       TEXT NOT NULL,
+    value        REAL,
+    PRIMARY KEY (company, week, source, article, metric)
+);
+CREATE TABLE IF NOT EXISTS week_metrics (
+    company      TEXT NOT NULL,
+    week         TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    source       TEXT NOT NULL,
+    metric       TEXT NOT NULL,
+    value        REAL,
+    PRIMARY KEY (company, week, source, metric)
+);
+CREATE TABLE IF NOT EXISTS articles (
+    company TEXT NOT NULL,
+    source  TEXT NOT NULL,
+    article TEXT NOT NULL,
+    label   TEXT NOT NULL,
+    PRIMARY KEY (company, source, article)
+);
+CREATE INDEX IF NOT EXISTS idx_weeks_period ON weeks (period_start);
+CREATE INDEX IF NOT EXISTS idx_article_metrics_article ON article_metrics (article, metric);
+CREATE INDEX IF NOT EXISTS idx_article_metrics_week ON article_metrics (week);
+CREATE INDEX IF NOT EXISTS idx_article_metrics_period ON article_metrics (company, period_start);
+CREATE INDEX IF NOT EXISTS idx_week_metrics_week ON week_metrics (week);
+CREATE INDEX IF NOT EXISTS idx_week_metrics_period ON week_metrics (company, period_start);
+"""
+
+
+@contextmanager
+def open_store(path=DB_PATH):
+    """Соединение с базой метрик: схема создаётся при первом открытии,
+    изменения фиксируются при выходе из блока (при ошибке — откатываются)"""
+    import sqlite3
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # timeout — воркеры пула пишут в одну базу, каждый своей транзакцией
+    conn = sqlite3.connect(path, timeout=60)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value  # NaN → NULL
+
+
+def _replace_week(conn, company, week, period_start, source, article_rows, week_rows):
+    """Перезаписывает всё, что хранится по неделе из этого источника"""
+    period_start = str(period_start)
+    conn.execute(
+        "INSERT INTO weeks (company, week, period_start, updated_at) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (company, week) DO UPDATE SET period_start = excluded.period_start, "
+        "updated_at = excluded.updated_at",
+        (company, week, period_start, datetime.now().isoformat(timespec="seconds")),
+    )
+    key = (company, week, source)
+    conn.execute("DELETE FROM article_metrics WHERE company = ? AND week = ? AND source = ?", key)
+    conn.execute("DELETE FROM week_metrics WHERE company = ? AND week = ? AND source = ?", key)
+    conn.executemany(
+        "INSERT INTO article_metrics VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (company, week, source, article, metric) DO UPDATE SET value = value + excluded.value",
+        [(company, week, period_start, source, article, metric, _number(value))
+         for article, metric, value in article_rows],
+    )
+    conn.executemany(
+        "INSERT INTO week_metrics VALUES (?, ?, ?, ?, ?, ?)",
+        [(company, week, period_start, source, metric, _number(value)) for metric, value in week_rows],
+    )
+
+
+def _save_labels(conn, company, source, labels):
+    conn.executemany(
+        "INSERT INTO articles VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (company, source, article) DO UPDATE SET label = excluded.label",
+        [(company, source, normalize_article(label), str(label)) for label in labels],
+    )
+
+
+def _article_rows(df, columns):
+    """(артикул, метрика, значение) по строкам df; артикул — ключ normalize_article"""
+    keys = [normalize_article(a) for a in df["Артикул поставщика"]]
+    for col in columns:
+        for key, value in zip(keys, df[col].to_list()):
+            yield key, col, value
+
+
+def store_report(conn, company, week, period_start, frames):
+    """Метрики report.xlsx: frames — результат build_report_dataframe.
+
+    По артикулам — колонки основного блока и себестоимости, за неделю —
+    строка "Total:", штрафы по видам и корректировки.
+    """
+    from utils.excel_formatting import report_totals
+
+    result_df, fines_df, summary_df, pre_last_df, last_df, correction = frames
+    per_article = result_df.join(pre_last_df)
+    columns = [c for c in per_article.columns if c != "Артикул поставщика"]
+    totals = report_totals(result_df, fines_df, summary_df, pre_last_df, last_df, correction)
+    week_rows = [(metric, value) for metric, value in totals.items() if metric not in NOT_SUMMED]
+
+    _replace_week(conn, company, week, period_start, REPORT_SOURCE, _article_rows(per_article, columns), week_rows)
+    _replace_week(conn, company, week, period_start, FINES_SOURCE, [],
+                  zip(fines_df["Виды штрафов"].astype(str), fines_df["Штрафы"]))
+    _replace_week(conn, company, week, period_start, CORRECTION_SOURCE, [],
+                  zip(CORRECTIONS, (c[0] for c in correction)))
+    _save_labels(conn, company, REPORT_SOURCE, result_df["Артикул поставщика"])
+
+
+def store_detailed(conn, company, week, period_start, detailed_df, agg):
+    """Метрики detailed_report.xlsx: суммируемые колонки и числители выкупа.
+
+    Проценты не хранятся — за любой период их пересчитывают из сумм
+    (выкуп — из cnt_up и cnt_cancel).
+    """
+    from utils.aggregation import buyout_counts
+    from utils.detailed_excel_fromatting import PCT_COLUMNS
+
+    columns = [c for c in detailed_df.columns if c != "Артикул поставщика" and c not in PCT_COLUMNS]
+    keys = [normalize_article(a) for a in detailed_df["Артикул поставщика"]]
+    counts = buyout_counts(agg, keys)
+    df = detailed_df[["Артикул поставщика", *columns]].assign(
+        **{BUYOUT_UP: counts[BUYOUT_UP].to_numpy(), BUYOUT_CANCEL: counts[BUYOUT_CANCEL].to_numpy()}
+    )
+    columns += [BUYOUT_UP, BUYOUT_CANCEL]
+    week_rows = [(col, df[col].sum()) for col in columns if col not in NOT_SUMMED]
+
+    _replace_week(conn, company, week, period_start, DETAILED_SOURCE, _article_rows(df, columns), week_rows)
+    _save_labels(conn, company, DETAILED_SOURCE, detailed_df["Артикул поставщика"])
+
+
+def _where(company=None, since=None, until=None, table="", **eq):
+    """WHERE по заданным (не None) фильтрам; since/until — по началу недели"""
+    prefix = f"{table}." if table else ""
+    clauses, params = [], []
+    if company is not None:
+        clauses.append(f"{prefix}company = ?")
+        params.append(company)
+    if since is not None:
+        clauses.append(f"{prefix}period_start >= ?")
+        params.append(str(since))
+    if until is not None:
+        clauses.append(f"{prefix}period_start <= ?")
+        params.append(str(until))
+    for col, value in eq.items():
+        if value is not None:
+            clauses.append(f"{prefix}{col} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _frame(conn, sql, params):
+    import pandas as pd
+
+    df = pd.read_sql_query(sql, conn, params=params)
+    if "period_start" in df.columns:
+        df["period_start"] = pd.to_datetime(df["period_start"])
+    return df
+
+
+def list_weeks(conn, company=None, since=None, until=None):
+    """Недели в базе: company, week, period_start, updated_at"""
+    where, params = _where(company, since, until)
+    return _frame(conn, f"SELECT * FROM weeks{where} ORDER BY company, period_start, week", params)
+
+
+def query_articles(conn, metric=None, company=None, article=None, since=None, until=None, source=REPORT_SOURCE):
+    """Метрики по артикулам в длинном формате
+    (company, week, period_start, article, label, metric, value)"""
+    where, params = _where(company, since, until, table="m", source=source, metric=metric,
+                           article=normalize_article(article) if article is not None else None)
+    sql = (
+        "SELECT m.company, m.week, m.period_start, m.article, a.label, m.metric, m.value "
+        "FROM article_metrics AS m LEFT JOIN articles AS a "
+        "ON a.company = m.company AND a.source = m.source AND a.article = m.article"
+        f"{where} ORDER BY m.company, m.period_start, m.article"
+    )
+    return _frame(conn, sql, params)
+
+
+def query_weeks(conn, metric=None, company=None, since=None, until=None, source=REPORT_SOURCE):
+    """Итоги по неделям в длинном формате (company, week, period_start, metric, value)"""
+    where, params = _where(company, since, until, source=source, metric=metric)
+    sql = (f"SELECT company, week, period_start, metric, value FROM week_metrics{where} "
+           "ORDER BY company, period_start, week")
+    return _frame(conn, sql, params)
+
+
+def week_series(conn, metric, company=None, since=None, until=None, source=REPORT_SOURCE):
+    """Одна метрика по неделям: строки — начало недели, колонки — компании"""
+    df = query_weeks(conn, metric, company, since, until, source)
+    return df.pivot_table(index="period_start", columns="company", values="value", aggfunc="sum")
+
+
+def sum_articles(conn, company, since=None, until=None, source=REPORT_SOURCE):
+    """Метрики по артикулам за период: строки — артикулы в порядке появления,
+    колонки — label и метрики. Суммируемые метрики сложены, из NOT_SUMMED
+    взято значение последней недели."""
+    where, params = _where(company, since, until, table="m", source=source)
+    sql = (
+        "SELECT m.article, a.label, m.metric, m.value "
+        "FROM article_metrics AS m LEFT JOIN articles AS a "
+        "ON a.company = m.company AND a.source = m.source AND a.article = m.article"
+        f"{where} ORDER BY m.period_start, m.rowid"
+    )
+    df = _frame(conn, sql, params).fillna({"value": 0})
+    order = df["article"].drop_duplicates()
+    last = df["metric"].isin(NOT_SUMMED)
+    summed = df[~last].groupby(["article", "metric"], sort=False)["value"].sum().unstack()
+    latest = df[last].groupby(["article", "metric"], sort=False)["value"].last().unstack()
+    out = summed.join(latest) if len(latest.columns) else summed
+    labels = df.drop_duplicates("article").set_index("article")["label"]
+    out.insert(0, "label", labels.fillna(labels.index.to_series()))
+    return out.reindex(order).fillna(0)
+
+
+def sum_weeks(conn, company, since=None, until=None, source=REPORT_SOURCE):
+    """Итоги за период: метрика → сумма по неделям (в порядке появления)"""
+    where, params = _where(company, since, until, source=source)
+    df = _frame(conn, f"SELECT metric, value FROM week_metrics{where} ORDER BY period_start, rowid", params)
+    return df.fillna({"value": 0}).groupby("metric", sort=False)["value"].sum()
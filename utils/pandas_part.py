@@ -1,92 +1,47 @@
-from pathlib import Path
-import json
 from utils.constants import WB_COMMISSION_RATE, UPSELL_RATE
-from utils.calculations import (
-    count_of_sales, sum_of_revenue, sum_of_ekv_commission,
-    f_amount_to_be_transfered, f_logistic,
-    f_warehouse_storage, f_acceptence_of_goods,
-    f_sum_of_fine, f_djem, f_ads_wb, f_correction,
-    f_correction_sales, f_reklama
-)
-from utils.io_utils import read_excel
+from utils.aggregation import article_metrics, fine_metrics, ledger_totals
+from utils.dataset import WeekDataset
 from utils.currency import rub_to_kgs
 import pandas as pd
 
 
-def build_report_dataframe(dt_path):
+def build_report_dataframe(dataset):
     """Формирует основной DataFrame с данными из pandas"""
 
-    data_path = dt_path / "0.xlsx"
-    df = read_excel(data_path)
+    if not isinstance(dataset, WeekDataset):
+        dataset = WeekDataset.load(dataset)
 
-    cfg_paths = Path("configs")
-    products = {}
+    rekl = dataset.ad_spend_total
 
-    for cfg_path in cfg_paths.rglob("*"):
+    agg = dataset.aggregates
+    articuls = dataset.articles
+    fines = agg.fine_kinds
+    totals = ledger_totals(agg)
 
-        with open(cfg_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        products = products | data["products"]
+    corrections = [[totals["correction"]], [totals["correction_sales"]], [rekl]]
 
-    reklama_path = dt_path / "1.xlsx"
-    rekl = 0
-    if reklama_path.exists():
-        df_reklama = read_excel(reklama_path)
-        rekl = f_reklama(df_reklama)
-
-    articuls = (
-        df["Артикул поставщика"]
-        .replace("", pd.NA)
-        .dropna()
-        .unique()
-    )
-
-    fines = (
-        df.loc[df["Общая сумма штрафов"] != 0, "Виды логистики, штрафов и корректировок ВВ"]
-        .replace("", pd.NA)
-        .dropna()
-        .unique()
-    )
-
-
-    corrections = [[f_correction(df)], [f_correction_sales(df)], [rekl]]
-
-    warehouse_storage = f_warehouse_storage(df)
-    djem = f_djem(df)
-    ads_wb = f_ads_wb(df)
+    warehouse_storage = totals["warehouse_storage"]
+    djem = totals["djem"]
+    ads_wb = totals["ads_wb"]
 #    site_retention = f_site_retention(df)
-    acceptence_of_goods = f_acceptence_of_goods(df)
+    acceptence_of_goods = totals["acceptence_of_goods"]
     ads = (rub_to_kgs(rekl)) - ads_wb
 
     if ads_wb * 0.05 > ads:
         ads = 0
     
     # собираем данные
-    sales_qty, revenue_net, commission_wb, acquiring_fee = [], [], [], []
-    payout_amount, logistics_cost, unit_cost_of_goods = [], [], []
-    total_cost, upsell_fee_5pct, sum_of_fines = [], [], []
-
-    for a in articuls:
-        n_sales = count_of_sales(a, df)
-        total_rev = sum_of_revenue(a, df)
-        ekv_sum = sum_of_ekv_commission(a, df)
-        to_transfer = f_amount_to_be_transfered(a, df)
-        logis = f_logistic(a, df)
-        cost = products.get(a, {}).get("unit_price", 0)
-
-        sales_qty.append(n_sales)
-        revenue_net.append(total_rev)
-        commission_wb.append(total_rev * WB_COMMISSION_RATE)
-        acquiring_fee.append(ekv_sum)
-        payout_amount.append(to_transfer)
-        logistics_cost.append(logis)
-        unit_cost_of_goods.append(cost)
-        total_cost.append(cost * n_sales)
-        upsell_fee_5pct.append(total_rev * UPSELL_RATE)
-
-    for f in fines:
-        fine_sum = f_sum_of_fine(f, df)
-        sum_of_fines.append(fine_sum)
+    metrics = article_metrics(agg, articuls)
+    sales_qty = metrics["sales_qty"].to_list()
+    revenue_net = metrics["revenue_net"].to_list()
+    acquiring_fee = metrics["acquiring_fee"].to_list()
+    payout_amount = metrics["payout_amount"].to_list()
+    logistics_cost = metrics["logistics_cost"].to_list()
+    commission_wb = [rev * WB_COMMISSION_RATE for rev in revenue_net]
+    upsell_fee_5pct = [rev * UPSELL_RATE for rev in revenue_net]
+    unit_cost_of_goods = dataset.unit_prices(articuls).to_list()
+    total_cost = [cost * n for cost, n in zip(unit_cost_of_goods, sales_qty)]
+    sum_of_fines = fine_metrics(agg).to_list()
 
     transfered_to_the_bank = (
         sum(payout_amount) - sum(logistics_cost) - warehouse_storage - sum(sum_of_fines) - djem - ads_wb
@@ -105,7 +60,7 @@ def build_report_dataframe(dt_path):
 
     # основной блок
     result_df = pd.DataFrame({
-        "Артикул поставщика": articuls,
+        "Артикул поставщика": agg.article_labels(articuls),
         "Кол-во продаж": sales_qty,
         "Выручка (продажи - возвраты)": revenue_net,
         "Комиссия WB": commission_wb,
@@ -0,0 +1,190 @@
+from numbers import Integral
+from pathlib import Path
+import math
+import textwrap
+import traceback
+
+from utils.cards import card_layout, fmt_money, table_header_color, title_color
+from utils.manifest import REPORT, DETAILED
+from utils.planner import WeekFilter, week_start
+from utils.SecondList import MPL_LOCK, draw_cards
+from utils.totals import read_report_totals
+from utils.trace import span, week_context
+
+# PDF для рассылки (message.txt ссылается на «прикреплённые PDF-файлы»): по
+# каждой неделе из reports/<компания>/<неделя>/ — страница карточек и страницы
+# таблицы по артикулам. Все страницы рисуются внутри одной настройки шрифтов
+# и пишутся сразу в PDF компании и в общий PDF оператора.
+COMPANY_PDF = "bundle.pdf"       # reports/<компания>/bundle.pdf
+OPERATOR_PDF = "bundle_all.pdf"  # reports/bundle_all.pdf
+
+A4 = (8.27, 11.69)
+A4_LANDSCAPE = (11.69, 8.27)
+
+ROWS_PER_PAGE = 40   # строк таблицы на альбомной странице
+HEADER_ROWS = 3      # шапка с переносами высотой в три строки
+TABLE_FS = 4
+HEADER_WIDTH = 11    # символов в строке заголовка колонки
+COUNT_COLUMNS = ("Кол-во продаж",)
+BOLD_ROWS = ("Total:", "Percentage:", "Корректировка")
+
+
+def find_bundle_weeks(reports_root, filters=None, today=None):
+    """Папки готовых отчётов reports/<компания>/<неделя>/ по фильтру (WeekFilter),
+    по компаниям и дате начала недели. Сводные отчёты за месяц/квартал
+    (2026-10, 2026-Q4) лежат рядом, но неделями не являются и пропускаются."""
+    found = []
+    for week_dir in (filters or WeekFilter()).discover(reports_root, today, marker=REPORT):
+        start = week_start(week_dir.name, today)
+        if start is not None:
+            found.append((week_dir.parent.name, start, week_dir))
+    return [week_dir for _, _, week_dir in sorted(found)]
+
+
+def _cell(value, column):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, Integral) or (column in COUNT_COLUMNS and float(value).is_integer()):
+        return str(int(value))
+    if isinstance(value, float):
+        return fmt_money(value)
+    return str(value)
+
+
+def article_table(report_dir):
+    """(шапка, строки) таблицы по артикулам как в Excel: detailed_report.xlsx,
+    а если его нет (недели без 2.xlsx) — report.xlsx"""
+    import pandas as pd
+
+    path = report_dir / DETAILED
+    if not path.exists():
+        path = report_dir / REPORT
+    df = pd.read_excel(path, sheet_name="Отчёт")
+    columns = [str(c) for c in df.columns]
+    rows = [[_cell(v, c) for v, c in zip(row, columns)] for row in df.itertuples(index=False, name=None)]
+    return [textwrap.fill(c, HEADER_WIDTH, break_long_words=False) for c in columns], rows
+
+
+def draw_table(fig, title, columns, rows):
+    """Страница таблицы на пустой фигуре fig. Сетка — две коллекции линий и
+    по тексту на непустую ячейку: matplotlib.table на каждую ячейку строит и
+    измеряет отдельный прямоугольник, и страница рисуется в разы дольше.
+    Высота строки одна и та же на всех страницах, поэтому последняя
+    (неполная) страница не растягивается."""
+    from itertools import accumulate
+    from matplotlib.patches import Rectangle
+
+    fig.text(0.5, 0.97, title, ha="center", va="top", fontsize=9, fontweight="bold", color=title_color)
+    ax = fig.add_axes([0.02, 0.03, 0.96, 0.9])
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis("off")
+
+    widths = [2] + [1] * (len(columns) - 1)
+    xs = [x / sum(widths) for x in accumulate(widths, initial=0)]
+    row_h = 1 / (ROWS_PER_PAGE + HEADER_ROWS)
+    header_bottom = 1 - row_h * HEADER_ROWS
+    ys = [1] + [header_bottom - r * row_h for r in range(len(rows) + 1)]
+
+    ax.add_patch(Rectangle((0, header_bottom), 1, 1 - header_bottom, facecolor=table_header_color, linewidth=0))
+    ax.hlines(ys, 0, 1, colors="#000000", linewidth=0.3)
+    ax.vlines(xs, ys[-1], 1, colors="#000000", linewidth=0.3)
+
+    for c, label in enumerate(columns):
+        ax.text((xs[c] + xs[c + 1]) / 2, (1 + header_bottom) / 2, label, ha="center", va="center",
+                fontsize=TABLE_FS, fontweight="bold", color=title_color)
+    pad = (xs[1] - xs[0]) * 0.03
+    for r, row in enumerate(rows):
+        y = header_bottom - (r + 0.5) * row_h
+        weight = "bold" if row[0] in BOLD_ROWS else "normal"
+        for c, value in enumerate(row):
+            if not value:
+                continue
+            x, ha = (xs[0] + pad, "left") if c == 0 else ((xs[c] + xs[c + 1]) / 2, "center")
+            ax.text(x, y, value, ha=ha, va="center", fontsize=TABLE_FS, fontweight=weight, color=title_color)
+
+
+def week_pages(report_dir):
+    """Страницы недели: [(размер, рисование)]. Все файлы недели читаются
+    здесь, до рисования."""
+    company, week = report_dir.parent.name, report_dir.name
+    layout = card_layout(read_report_totals(report_dir / REPORT), week, company)
+    columns, rows = article_table(report_dir)
+
+    pages = [(A4, lambda fig: draw_cards(fig, layout))]
+    chunks = [rows[i:i + ROWS_PER_PAGE] for i in range(0, len(rows), ROWS_PER_PAGE)] or [[]]
+    for n, chunk in enumerate(chunks, 1):
+        title = f"{company} — по артикулам — {week} (стр. {n}/{len(chunks)})"
+        pages.append((A4_LANDSCAPE, lambda fig, title=title, chunk=chunk: draw_table(fig, title, columns, chunk)))
+    return pages
+
+
+def draw_week(report_dir):
+    """Фигуры всех страниц недели, нарисованные целиком. В PDF они пишутся
+    только потом: неделя, на которой упало чтение или рисование, не оставит
+    в PDF половины своих страниц. Фигуры — без pyplot, их не нужно закрывать."""
+    from matplotlib.figure import Figure
+
+    figures = []
+    for size, draw in week_pages(report_dir):
+        fig = Figure(figsize=size)
+        draw(fig)
+        fig.draw_without_rendering()  # раскладка и текст: ошибки — здесь, а не посреди записи
+        figures.append(fig)
+    return figures
+
+
+def export_bundle(week_dirs, reports_root):
+    """reports/<компания>/bundle.pdf по каждой компании и reports/bundle_all.pdf
+    со всеми неделями подряд. Возвращает число недель с ошибками."""
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    reports_root = Path(reports_root)
+    by_company = {}
+    for week_dir in week_dirs:
+        by_company.setdefault(week_dir.parent.name, []).append(week_dir)
+
+    failed = 0
+    total_pages = 0
+    with MPL_LOCK, plt.rc_context({"font.family": "DejaVu Sans"}), \
+            PdfPages(reports_root / OPERATOR_PDF, metadata={"Title": "Еженедельные отчёты"}) as operator:
+        for company, dirs in by_company.items():
+            company_pdf = reports_root / company / COMPANY_PDF
+            n_pages = 0
+            with PdfPages(company_pdf, metadata={"Title": f"{company} — еженедельные отчёты"}) as own:
+                for report_dir in dirs:
+                    with week_context(company, report_dir.name), span("pdf_bundle"):
+                        try:
+                            figures = draw_week(report_dir)
+                        except Exception:
+                            failed += 1
+                            print(f"❌ {report_dir}:\n{traceback.format_exc()}")
+                            continue
+                        for fig in figures:
+                            for pdf in (own, operator):
+                                pdf.savefig(fig)
+                        n_pages += len(figures)
+            total_pages += n_pages
+            if n_pages:
+                print(f"✅ PDF {company}: {company_pdf} (страниц: {n_pages})")
+            else:  # PdfPages без страниц файл не трогает — не оставляем PDF прошлого запуска
+                company_pdf.unlink(missing_ok=True)
+                print(f"⚠️ PDF {company}: нет ни одной недели без ошибок")
+    if not total_pages:
+        (reports_root / OPERATOR_PDF).unlink(missing_ok=True)
+        print("⚠️ Общий PDF не собран: нет ни одной недели без ошибок")
+        return failed
+    print(f"✅ Общий PDF: {reports_root / OPERATOR_PDF} (страниц: {total_pages})")
+    return failed
+
+
+def run_pdf_bundle(reports_root, filters):
+    """PDF карточек и таблиц по готовым отчётам reports/ — по компании и общий"""
+    week_dirs = find_bundle_weeks(reports_root, filters)
+    if not week_dirs:
+        print("План: нет готовых отчётов недель для PDF (сначала соберите недели)")
+        return
+    print(f"PDF: недель — {len(week_dirs)}")
+    failed = export_bundle(week_dirs, reports_root)
+    print(f"Готово: {len(week_dirs) - failed} успешно, {failed} с ошибками")
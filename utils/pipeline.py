@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable
+    deps: tuple = ()
+
+
+@dataclass
+class StageGraph:
+    """Этапы сборки недели и зависимости между ними.
+
+    graph.add("report", build, "dataset") — этап вызывается как
+    build(результат "dataset"), когда готовы все его зависимости. Зависимости
+    объявляются раньше зависящих от них этапов, поэтому порядок объявления —
+    всегда допустимый последовательный порядок.
+    """
+    stages: dict = field(default_factory=dict)
+
+    def add(self, name, fn, *deps):
+        if name in self.stages:
+            raise ValueError(f"Этап {name} объявлен дважды")
+        missing = [d for d in deps if d not in self.stages]
+        if missing:
+            raise ValueError(f"Этап {name} зависит от необъявленных этапов: {', '.join(missing)}")
+        self.stages[name] = Stage(name, fn, deps)
+
+    def run(self, threads=1, errors=None, keep=None):
+        """Выполняет все этапы и возвращает {имя: результат}.
+
+        threads > 1 — независимые этапы идут параллельно в пуле из threads
+        потоков (каждый со своей копией contextvars, чтобы span знали неделю);
+        threads=1 — по порядку объявления в текущем потоке. Первая ошибка
+        останавливает запуск новых этапов и пробрасывается наружу.
+
+        errors — словарь: тогда ошибка этапа не пробрасывается, а попадает в
+        errors[имя], и пропускаются только зависящие от него этапы (их нет
+        и в результатах) — остальные артефакты недели всё равно собираются.
+
+        keep — имена этапов, результаты которых нужны после запуска: остальные
+        отпускаются, как только завершились все зависящие от них этапы (иначе
+        прочитанная детализация живёт до конца недели). None — вернуть все.
+        """
+        results = {}
+        skipped = set()
+        consumers = {name: 0 for name in self.stages}
+        for stage in self.stages.values():
+            for d in stage.deps:
+                consumers[d] += 1
+
+        def blocked(stage):
+            return any(d in skipped for d in stage.deps)
+
+        def finished(stage):
+            """Этап завершён (или пропущен): его зависимости ему больше не нужны"""
+            for d in stage.deps:
+                consumers[d] -= 1
+                if keep is not None and consumers[d] == 0 and d not in keep:
+                    results.pop(d, None)
+
+        def failed(name, exc):
+            if errors is None:
+                raise exc
+            errors[name] = exc
+            skipped.add(name)
+
+        if threads <= 1:
+            for stage in self.stages.values():
+                if blocked(stage):
+                    skipped.add(stage.name)
+                    finished(stage)
+                    continue
+                try:
+                    results[stage.name] = stage.fn(*(results[d] for d in stage.deps))
+                except Exception as exc:
+                    failed(stage.name, exc)
+                finished(stage)
+            return results
+
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="stage") as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if blocked(stage):
+                        skipped.add(name)
+                        del pending[name]
+                        finished(stage)
+                    elif all(d in results for d in stage.deps):
+                        future = pool.submit(copy_context().run, stage.fn, *(results[d] for d in stage.deps))
+                        running[future] = name
+                        del pending[name]
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        if errors is None:
+                            for other in running:
+                                other.cancel()
+                        failed(name, future.exception())
+                    else:
+                        results[name] = future.result()
+                    finished(self.stages[name])
+                del done, future  # завершённые future держат свои результаты
+        return results
@@ -0,0 +1,236 @@
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from fnmatch import fnmatch
+from pathlib import Path
+import re
+
+from utils.catalog import get_catalog
+from utils.manifest import (
+    REPORT, IMAGE, MESSAGE, DETAILED, ARTIFACTS, artifact_keys, input_hashes, load_manifest, stale_artifacts,
+    record_artifacts, report_articles
+)
+from utils.metrics_store import DB_PATH
+
+LEDGER = "0.xlsx"  # без детализации неделю не собрать
+
+_WEEK_START = re.compile(r"^\s*(\d{1,2})\.(\d{1,2})(?:\.(\d{2,4}))?")
+_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+
+
+STAGE_THREADS = 3  # этапов одной недели одновременно (чтение трёх входных файлов)
+
+
+@dataclass(frozen=True)
+class BuildOptions:
+    """Настройки сборки недели — флаги main.py, общие для всех недель запуска.
+
+    low_memory — отпустить детализацию сразу после агрегатов; memory_report —
+    печатать пик памяти по этапам; metrics_db — база метрик (None — не вести);
+    threads — этапов недели параллельно; chunk_rows — читать 0.xlsx кусками.
+    """
+    renderer: str = "matplotlib"
+    dpi: int = 300
+    low_memory: bool = False
+    memory_report: bool = False
+    metrics_db: Path | None = None
+    threads: int = STAGE_THREADS
+    chunk_rows: int | None = None
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(renderer=args.renderer, dpi=args.dpi, low_memory=args.low_memory,
+                   memory_report=args.memory_report, metrics_db=None if args.no_metrics else args.metrics_db,
+                   threads=args.threads, chunk_rows=args.chunk_rows)
+
+    @property
+    def render(self):
+        """Настройки, от которых зависит image_report.png — входят в ключи манифеста"""
+        return {"renderer": self.renderer, "dpi": self.dpi}
+
+
+@dataclass(frozen=True)
+class WeekFilter:
+    """Какие недели брать: --company, --since/--until (по дате начала недели), --week"""
+    companies: tuple = ()
+    since: date | None = None
+    until: date | None = None
+    week_glob: str | None = None
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(tuple(args.company or ()), args.since, args.until, args.week)
+
+    def discover(self, root, today=None, marker=None):
+        """discover_weeks по этому фильтру; marker — см. discover_weeks"""
+        return discover_weeks(root, self.companies, self.since, self.until, self.week_glob, today,
+                              marker=marker or LEDGER)
+
+
+def report_period(today=None):
+    """Даты для message.txt: с понедельника текущей недели по today + 6 дней
+    (так считал исходный скрипт)"""
+    today = today or date.today()
+    return today - timedelta(days=today.weekday()), today + timedelta(days=6)
+
+
+@dataclass
+class WeekJob:
+    """Одна неделя к сборке и артефакты, которые нужно пересобрать"""
+    company: str
+    data_path: Path
+    report_path: Path
+    start_date: date
+    end_date: date
+    options: BuildOptions = field(default_factory=BuildOptions)
+    stale: set = field(default_factory=lambda: set(ARTIFACTS))
+    fresh: bool = True  # папки отчёта ещё не было
+    profile: Path | None = None  # куда сохранить cProfile этой недели
+
+    @property
+    def name(self):
+        return f"{self.company}/{self.report_path.name}"
+
+
+def week_start(week, today=None):
+    """Дата начала недели из имени папки: "01.10-07.10" → 1 октября.
+
+    Если год в имени не указан, берётся год today; дата из будущего
+    означает прошлый год (папка "29.12-04.01", разобранная в январе).
+    None, если имя не начинается с дд.мм.
+    """
+    m = _WEEK_START.match(str(week))
+    if m is None:
+        return None
+    today = today or date.today()
+    day, month, year = int(m.group(1)), int(m.group(2)), m.group(3)
+    try:
+        if year:
+            return date(int(year) + (2000 if len(year) == 2 else 0), month, day)
+        start = date(today.year, month, day)
+        return start if start <= today else date(today.year - 1, month, day)
+    except ValueError:
+        return None
+
+
+def parse_bound(text, today=None):
+    """Граница --since/--until: ГГГГ-ММ-ДД или дд.мм[.гггг] как в именах недель"""
+    m = _DATE.match(text.strip())
+    if m:
+        return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    start = week_start(text, today)
+    if start is None:
+        raise ValueError(f"Не понимаю дату: {text!r} (ожидается ГГГГ-ММ-ДД или дд.мм)")
+    return start
+
+
+def discover_weeks(data_root, companies=None, since=None, until=None, week_glob=None, today=None,
+                   marker=LEDGER):
+    """Папки data/<компания>/<неделя>/ с 0.xlsx — каждая ровно один раз.
+
+    companies — имена компаний; since/until — даты (включительно) по началу
+    недели из имени папки; week_glob — шаблон имени недели; marker — файл,
+    по которому папка считается неделей (report.xlsx — готовые отчёты в reports/).
+    """
+    data_root = Path(data_root)
+    if not data_root.is_dir():
+        return []
+    weeks = []
+    for company_dir in sorted(p for p in data_root.iterdir() if p.is_dir()):
+        if companies and company_dir.name not in companies:
+            continue
+        for week_dir in sorted(p for p in company_dir.iterdir() if p.is_dir()):
+            if not (week_dir / marker).exists():
+                continue
+            if week_glob and not fnmatch(week_dir.name, week_glob):
+                continue
+            if since or until:
+                start = week_start(week_dir.name, today)
+                if start is None or (since and start < since) or (until and start > until):
+                    continue
+            weeks.append(week_dir)
+    return weeks
+
+
+def plan_jobs(week_dirs, data_root, reports_root, options=None, force=False, dry_run=False, today=None):
+    """План сборки: недели без отчёта, с устаревшими артефактами или все (force).
+
+    Отчёт без манифеста (собран до его появления): лежащие в папке артефакты
+    считаются актуальными и записываются в манифест с текущими ключами
+    (кроме dry_run), а недостающие собираются в этом же запуске (см. adopt_artifacts).
+    """
+    options = options or BuildOptions()
+    start_date, end_date = report_period(today)
+    catalog = get_catalog()
+    jobs = []
+    for data_path in week_dirs:
+        rel = Path(data_path).relative_to(data_root)
+        report_path = Path(reports_root) / rel
+        job = WeekJob(rel.parts[0], Path(data_path), report_path, start_date, end_date, options)
+        if not report_path.exists():
+            jobs.append(job)
+            continue
+        job.fresh = False
+        if force:
+            jobs.append(job)
+            continue
+        inputs = input_hashes(data_path)
+        if load_manifest(report_path) is None:
+            articles, adopted = adopt_artifacts(report_path)
+            if dry_run:
+                stale = {a for a in artifact_keys(inputs, {}, options.render) if a not in adopted}
+            else:
+                record_artifacts(report_path, inputs, catalog, job.company, options.render, articles, adopted)
+                stale = stale_artifacts(report_path, inputs, catalog, job.company, options.render)
+        else:
+            stale = stale_artifacts(report_path, inputs, catalog, job.company, options.render)
+        if stale:
+            job.stale = stale
+            jobs.append(job)
+    return jobs
+
+
+def adopt_artifacts(report_path):
+    """Что из папки отчёта без манифеста можно записать в манифест как актуальное:
+    ({артефакт: артикулы}, [артефакты]).
+
+    Артикулы report.xlsx и detailed_report.xlsx читаются из самих файлов — без
+    них в ключ не попадут цены из configs/, и правка цены не пересоберёт отчёт.
+    Нечитаемый отчёт не записывается (соберётся заново), а с report.xlsx — и
+    собранные из него image_report.png и message.txt.
+    """
+    present = [a for a in ARTIFACTS if (report_path / a).exists()]
+    articles = {}
+    for name in (REPORT, DETAILED):
+        if name in present:
+            try:
+                articles[name] = report_articles(report_path / name)
+            except Exception:
+                present.remove(name)
+    if REPORT not in articles:
+        present = [a for a in present if a not in (IMAGE, MESSAGE)]
+    return articles, present
+
+
+def backfill_jobs(week_dirs, data_root, reports_root, options=None, today=None):
+    """Все выбранные недели для --backfill: отчёты не трогаются, метрики
+    пишутся в базу options.metrics_db (по умолчанию DB_PATH)"""
+    options = options or BuildOptions()
+    options = replace(options, metrics_db=options.metrics_db or DB_PATH)
+    start_date, end_date = report_period(today)
+    jobs = []
+    for data_path in week_dirs:
+        rel = Path(data_path).relative_to(data_root)
+        jobs.append(WeekJob(rel.parts[0], Path(data_path), Path(reports_root) / rel, start_date, end_date,
+                            options, fresh=False))
+    return jobs
+
+
+def format_plan(jobs):
+    """План для печати перед запуском"""
+    if not jobs:
+        return "План: все отчёты актуальны"
+    lines = [f"План: недель к сборке — {len(jobs)}"]
+    for job in jobs:
+        what = "новый отчёт" if job.fresh else ", ".join(a for a in ARTIFACTS if a in job.stale)
+        lines.append(f"  • {job.name}: {what}")
+    return "\n".join(lines)
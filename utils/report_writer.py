@@ -0,0 +1,111 @@
+from copy import copy
+from numbers import Number
+from math import isinf, isnan
+
+from openpyxl import Workbook
+from openpyxl.cell.cell import MergedCell
+from openpyxl.utils import get_column_letter
+
+from utils.trace import span
+from utils.excel_styles import (
+    header_fill, header_font, center, border,
+    HEADER_HEIGHT, FREEZE_PANES, SHEET_NAME,
+    DATA, BLANK, CORRECTION, TOTAL, PERCENT
+)
+
+
+def report_rows(table):
+    """Строки итогового листа из таблицы, где последние три строки —
+    корректировка, Total и Percentage: между ними пустые строки-разделители."""
+    values = [list(r) for r in table.itertuples(index=False, name=None)]
+    body, correction, total, percent = values[:-3], values[-3], values[-2], values[-1]
+    return (
+        [(DATA, r) for r in body]
+        + [(BLANK, None)] * 3
+        + [(CORRECTION, correction), (BLANK, None), (TOTAL, total), (BLANK, None), (PERCENT, percent)]
+    )
+
+
+def _saved_value(v):
+    """Значение ячейки так, как openpyxl прочитает его из сохранённого файла"""
+    if v is None or v == "":
+        return None
+    if isinstance(v, Number) and not isinstance(v, bool):
+        if isnan(v) or isinf(v):
+            return None
+        s = "%.16g" % v
+        return float(s) if any(c in s for c in ".eE") else int(s)
+    return v
+
+
+def column_widths(columns, rows):
+    """Автоширина: самое длинное значение колонки, не меньше 10, плюс 2"""
+    widths = []
+    for i, name in enumerate(columns):
+        max_len = len(str(name))
+        for _, values in rows:
+            v = values[i] if values is not None else None
+            max_len = max(max_len, len(str(_saved_value(v))))
+        widths.append(max(max_len, 10) + 2)
+    return widths
+
+
+@span("write_xlsx")
+def write_sheet(path, columns, rows, cell_style, header_style=None, merges=()):
+    """Собирает лист целиком в памяти и сохраняет файл один раз.
+
+    rows — список (вид строки, значения | None) из report_rows.
+    cell_style(вид, буква колонки) → (заливка | None, формат числа | None).
+    header_style(буква колонки) → заливка шапки | None (по умолчанию серая).
+    merges — диапазоны вида "J2:J10"; объединённые ячейки получают только
+    выравнивание и рамку.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = SHEET_NAME
+
+    letters = [get_column_letter(i) for i in range(1, len(columns) + 1)]
+    protos = {}
+
+    def apply(cell, fill, number_format, font=None):
+        key = (fill, number_format, font)
+        proto = protos.get(key)
+        if proto is not None:
+            cell._style = copy(proto)
+            return
+        cell.alignment = center
+        cell.border = border
+        if fill is not None:
+            cell.fill = fill
+        if font is not None:
+            cell.font = font
+        if number_format is not None:
+            cell.number_format = number_format
+        protos[key] = copy(cell._style)
+
+    # объединяем до заполнения: так merge_cells не переносит рамки на края диапазона
+    merged = set()
+    for rng in merges:
+        ws.merge_cells(rng)
+        for row in ws[rng]:
+            merged.update((cell.row, cell.column) for cell in row if isinstance(cell, MergedCell))
+
+    for c, (name, letter) in enumerate(zip(columns, letters), start=1):
+        fill = header_style(letter) if header_style else header_fill
+        apply(ws.cell(row=1, column=c, value=name), fill, None, header_font)
+
+    for r, (kind, values) in enumerate(rows, start=2):
+        for c, letter in enumerate(letters, start=1):
+            if (r, c) in merged:
+                apply(ws.cell(row=r, column=c), None, None)
+                continue
+            cell = ws.cell(row=r, column=c, value=values[c - 1] if values is not None else None)
+            apply(cell, *cell_style(kind, letter))
+
+    ws.row_dimensions[1].height = HEADER_HEIGHT
+    for letter, width in zip(letters, column_widths(columns, rows)):
+        ws.column_dimensions[letter].width = width
+
+    ws.freeze_panes = FREEZE_PANES
+    wb.save(path)
+
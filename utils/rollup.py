@@ -0,0 +1,190 @@
+from datetime import date, timedelta
+from pathlib import Path
+import re
+import traceback
+
+from utils.metrics_store import (
+    REPORT_SOURCE, DETAILED_SOURCE, FINES_SOURCE, CORRECTION_SOURCE, CORRECTIONS,
+    BUYOUT_UP, BUYOUT_CANCEL, open_store, list_weeks, sum_articles, sum_weeks
+)
+from utils.manifest import REPORT, IMAGE, DETAILED
+from utils.trace import span, week_context
+
+# Отчёты за месяц и квартал из базы метрик: недельные суммы по артикулам
+# складываются, проценты и выкуп пересчитываются из сложенных числителей и
+# знаменателей. Неделя относится к периоду по дате своего начала.
+PERIODS = ("month", "quarter")
+REPORT_TITLES = {"month": "Ежемесячный отчёт", "quarter": "Квартальный отчёт"}  # заголовок карточек
+
+_PERIOD = re.compile(r"^(\d{4})-(?:(\d{2})|Q([1-4]))$")
+
+REPORT_COLUMNS = ["Кол-во продаж", "Выручка (продажи - возвраты)", "Комиссия WB", "Комиссия эквайринга",
+                  "Сумма к перечислению", "Логистика"]
+SUMMARY_COLUMNS = ["Хранение на складе", "Джем", "Реклама со счёта WB", "Приемка товара",
+                   "Перечислено банку", "Реклама с собственного счёта"]
+COST_COLUMNS = ["Себестоимость единицы товара", "Общая себестоимость", "Upsell-услуги (5%)"]
+
+# раскладка detailed_report.xlsx: None — процент, пересчитываемый ниже
+DETAILED_COLUMNS = ["Кол-во продаж", "Выручка (продажи - возвраты)", "Выручка %", "Комиссия WB",
+                    "Комиссия эквайринга", "Сумма к перечислению", "Логистика", "Логистика %",
+                    "Хранение на складе", "Хранение % от собственного дохода", "Хранение % от всей суммы",
+                    "Штрафы", "Джем", "Приемка товара", "Перечислено банку", "Реклама", "Реклама %",
+                    "Себестоимость единицы товара", "Общая себестоимость", "Себестоимость %",
+                    "Upsell-услуги (5%)", "Чистая Прибыль", "Чистая Прибыль %", "Выкуп"]
+
+
+def period_bounds(day, kind):
+    """(метка, первый день, последний день) месяца или квартала, куда попадает day"""
+    if kind == "month":
+        first = date(day.year, day.month, 1)
+        label = f"{day.year}-{day.month:02d}"
+        months = 1
+    elif kind == "quarter":
+        q = (day.month - 1) // 3
+        first = date(day.year, q * 3 + 1, 1)
+        label = f"{day.year}-Q{q + 1}"
+        months = 3
+    else:
+        raise ValueError(f"Неизвестный период: {kind} (ожидается {', '.join(PERIODS)})")
+    month = first.month - 1 + months
+    last = date(first.year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return label, first, last
+
+
+def parse_period(text):
+    """"2026-10" → ("month", ...), "2026-Q4" → ("quarter", ...)"""
+    m = _PERIOD.match(text.strip())
+    if m is None:
+        raise ValueError(f"Не понимаю период: {text!r} (ожидается ГГГГ-ММ или ГГГГ-Qn)")
+    year = int(m.group(1))
+    if m.group(2):
+        month = int(m.group(2))
+        if not 1 <= month <= 12:
+            raise ValueError(f"Не понимаю период: {text!r} (месяц 01–12)")
+        return ("month", *period_bounds(date(year, month, 1), "month"))
+    return ("quarter", *period_bounds(date(year, (int(m.group(3)) - 1) * 3 + 1, 1), "quarter"))
+
+
+def find_periods(conn, kind, companies=None, since=None, until=None):
+    """[(компания, метка, первый день, последний день, недель)] по неделям из базы"""
+    weeks = list_weeks(conn, since=since, until=until)
+    if companies:
+        weeks = weeks[weeks["company"].isin(companies)]
+    found = {}
+    for company, start in zip(weeks["company"], weeks["period_start"]):
+        label, first, last = period_bounds(start.date(), kind)
+        key = (company, label, first, last)
+        found[key] = found.get(key, 0) + 1
+    return [(*key, n) for key, n in found.items()]
+
+
+def rollup_report_frames(conn, company, first, last):
+    """То же, что build_report_dataframe, но за период — из недельных сумм.
+    None, если за период в базе нет недель."""
+    import pandas as pd
+
+    per_article = sum_articles(conn, company, first, last, REPORT_SOURCE)
+    if per_article.empty:
+        return None
+    week = sum_weeks(conn, company, first, last, REPORT_SOURCE)
+    fines = sum_weeks(conn, company, first, last, FINES_SOURCE)
+    corrections = sum_weeks(conn, company, first, last, CORRECTION_SOURCE)
+
+    def col(name):
+        return per_article[name] if name in per_article else 0.0
+
+    result_df = pd.DataFrame({"Артикул поставщика": per_article["label"],
+                              **{name: col(name) for name in REPORT_COLUMNS}}).reset_index(drop=True)
+    fines_df = pd.DataFrame({"Виды штрафов": fines.index.to_list(), "Штрафы": fines.to_list()})
+    summary_df = pd.DataFrame([{name: week.get(name, 0.0) for name in SUMMARY_COLUMNS}])
+    pre_last_df = pd.DataFrame({name: col(name) for name in COST_COLUMNS}).reset_index(drop=True)
+    last_df = pd.DataFrame([{"Чистая Прибыль": week.get("Чистая Прибыль", 0.0)}])
+    correction = [[corrections.get(name, 0.0)] for name in CORRECTIONS]
+    return result_df, fines_df, summary_df, pre_last_df, last_df, correction
+
+
+def rollup_detailed_report(conn, company, first, last):
+    """То же, что build_detailed_report, за период: проценты — из сумм периода,
+    выкуп — из сложенных cnt_up и cnt_cancel. None, если детализации нет."""
+    import numpy as np
+    import pandas as pd
+    from utils.detailed_pandas import _pct
+
+    per_article = sum_articles(conn, company, first, last, DETAILED_SOURCE)
+    if per_article.empty:
+        return None
+    corrections = sum_weeks(conn, company, first, last, CORRECTION_SOURCE)
+
+    def col(name):
+        return per_article[name].to_numpy(dtype="float64") if name in per_article else np.zeros(len(per_article))
+
+    revenue = col("Выручка (продажи - возвраты)")
+    storage = col("Хранение на складе")
+    cnt_up = col(BUYOUT_UP)
+    cnt_dw = cnt_up + col(BUYOUT_CANCEL)
+    pct = {
+        "Выручка %": _pct(revenue, revenue.sum()),
+        "Логистика %": _pct(col("Логистика"), revenue),
+        "Хранение % от собственного дохода": _pct(storage, revenue),
+        "Хранение % от всей суммы": _pct(storage, storage.sum()),
+        "Реклама %": _pct(col("Реклама"), revenue),
+        "Себестоимость %": _pct(col("Общая себестоимость"), revenue),
+        "Чистая Прибыль %": _pct(col("Чистая Прибыль"), revenue),
+        "Выкуп": _pct(cnt_up, cnt_dw),
+    }
+    result_df = pd.DataFrame({"Артикул поставщика": per_article["label"].to_numpy(),
+                              **{name: pct[name] if name in pct else col(name) for name in DETAILED_COLUMNS}})
+    correction, correction_sales = corrections.get("correction", 0.0), corrections.get("correction_sales", 0.0)
+    buyout = float(_pct(cnt_up.sum(), cnt_dw.sum()))
+    return result_df, [[correction], [correction], [correction_sales]], buyout
+
+
+def build_rollup(conn, company, label, first, last, out_dir, renderer="matplotlib", dpi=300):
+    """report.xlsx, image_report.png и detailed_report.xlsx за период в out_dir"""
+    from utils.excel_formatting import format_and_save_report
+    from utils.detailed_excel_fromatting import format_and_save_detailed_report
+    from utils.SecondList import export_cards_png
+
+    frames = rollup_report_frames(conn, company, first, last)
+    if frames is None:
+        raise ValueError(f"В базе метрик нет недель {company} за {label}")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    totals = format_and_save_report(*frames, out_dir / REPORT)
+    export_cards_png(totals, out_dir / IMAGE, f"{first:%d.%m.%Y}-{last:%d.%m.%Y}", str(company),
+                     renderer=renderer, dpi=dpi, report_title=REPORT_TITLES[parse_period(label)[0]])
+    detailed = rollup_detailed_report(conn, company, first, last)
+    if detailed is not None:
+        format_and_save_detailed_report(*detailed, out_dir / DETAILED)
+
+
+def run_rollups(kind, periods, filters, metrics_db, reports_root, options):
+    """Отчёты за месяц/квартал из базы метрик в reports/<компания>/<период>/.
+
+    periods — [(вид, метка, первый день, последний день)] из --period; без них —
+    все периоды вида kind, за которые в базе есть недели. filters — WeekFilter
+    (компании и даты), options — BuildOptions (рендер карточек).
+    """
+    failed = 0
+    kinds = sorted({k for k, _, _, _ in periods}) if periods else [kind]
+    with open_store(metrics_db) as conn:
+        found = [p for k in kinds for p in find_periods(conn, k, filters.companies, filters.since, filters.until)]
+        if periods:
+            wanted = {label for _, label, _, _ in periods}
+            found = [p for p in found if p[1] in wanted]
+            missing = wanted - {p[1] for p in found}
+            if missing:
+                print(f"⚠️ В базе метрик нет недель за: {', '.join(sorted(missing))}")
+        if not found:
+            print("План: нет периодов для сводных отчётов (заполните базу: --backfill)")
+            return
+        for company, label, first, last, n_weeks in found:
+            try:
+                with week_context(company, label), span("rollup"):
+                    build_rollup(conn, company, label, first, last, Path(reports_root) / company / label,
+                                 renderer=options.renderer, dpi=options.dpi)
+                print(f"✅ Сводный отчёт {company}/{label}: недель — {n_weeks}")
+            except Exception:
+                failed += 1
+                print(f"❌ {company}/{label}:\n{traceback.format_exc()}")
+    print(f"Готово: {len(found) - failed} успешно, {failed} с ошибками")
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ReportTotals:
+    """Итоговая строка "Total:" отчёта report.xlsx — всё, что нужно карточкам
+    и сообщению клиенту."""
+    revenue: float = 0.0
+    commission_wb: float = 0.0
+    acquiring: float = 0.0
+    logistics: float = 0.0
+    storage: float = 0.0
+    fines: float = 0.0
+    djem: float = 0.0
+    ads_wb: float = 0.0
+    acceptance: float = 0.0
+    ads: float = 0.0
+    cogs: float = 0.0
+    upsell: float = 0.0
+    to_bank: float = 0.0
+    profit: float = 0.0
+
+    # колонка отчёта → поле
+    COLUMNS = {
+        "Выручка (продажи - возвраты)": "revenue",
+        "Комиссия WB": "commission_wb",
+        "Комиссия эквайринга": "acquiring",
+        "Логистика": "logistics",
+        "Хранение на складе": "storage",
+        "Штрафы": "fines",
+        "Джем": "djem",
+        "Реклама со счёта WB": "ads_wb",
+        "Приемка товара": "acceptance",
+        "Реклама с собственного счёта": "ads",
+        "Общая себестоимость": "cogs",
+        "Upsell-услуги (5%)": "upsell",
+        "Перечислено банку": "to_bank",
+        "Чистая Прибыль": "profit",
+    }
+
+    @classmethod
+    def from_row(cls, row):
+        """Из строки "Total:" (dict или pd.Series с названиями колонок отчёта)"""
+        return cls(**{field: float(row.get(col, 0) or 0) for col, field in cls.COLUMNS.items()})
+
+    @property
+    def djem_and_wb(self):
+        return self.djem + self.ads_wb
+
+    @property
+    def commissions(self):
+        return self.commission_wb + self.acquiring
+
+    @property
+    def total_expenses(self):
+        return (self.commissions + self.logistics + self.storage + self.fines + self.djem_and_wb
+                + self.ads + self.cogs + self.upsell + self.acceptance)
+
+
+def read_report_totals(xlsx_path, sheet_name="Отчёт"):
+    """Запасной путь: достаёт итоги из уже сохранённого report.xlsx"""
+    import pandas as pd
+
+    df = pd.read_excel(xlsx_path, sheet_name=sheet_name)
+    label_col = df.columns[0]
+    if "Total:" not in df[label_col].values:
+        raise ValueError("Не найдена строка 'Total:' в Excel-файле.")
+    return ReportTotals.from_row(df.loc[df[label_col] == "Total:"].iloc[0])
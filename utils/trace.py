@@ -0,0 +1,105 @@
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+import json
+import os
+import time
+
+# компания/неделя текущей сборки — попадают в каждый span
+_week = ContextVar("trace_week", default=(None, None))
+_parent = ContextVar("trace_parent", default=None)
+
+_spans = []
+
+
+class span(ContextDecorator):
+    """Замер этапа: with span("load", file="0.xlsx"): ... или @span("load").
+
+    Записывает имя, компанию/неделю из week_context, теги, родительский этап,
+    время начала и длительность; ошибка внутри помечается ok=False.
+    """
+
+    def __init__(self, name, **tags):
+        self.name = name
+        self.tags = tags
+
+    def _recreate_cm(self):
+        # в роли декоратора — новый замер на каждый вызов (в том числе из потоков)
+        return span(self.name, **self.tags)
+
+    def __enter__(self):
+        self._parent = _parent.get()
+        self._token = _parent.set(self.name)
+        self._started = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        _parent.reset(self._token)
+        company, week = _week.get()
+        _spans.append({
+            "name": self.name,
+            "company": company,
+            "week": week,
+            "parent": self._parent,
+            "start": self._started,
+            "duration": duration,
+            "ok": exc_type is None,
+            "pid": os.getpid(),
+            **({"tags": self.tags} if self.tags else {}),
+        })
+        return False
+
+
+@contextmanager
+def week_context(company, week):
+    """Все span внутри блока помечаются этой компанией и неделей"""
+    token = _week.set((str(company), str(week)))
+    try:
+        yield
+    finally:
+        _week.reset(token)
+
+
+def collect():
+    """Забирает накопленные span (воркер отдаёт их родителю вместе с результатом)"""
+    spans = list(_spans)
+    _spans.clear()
+    return spans
+
+
+def write_trace(spans, path):
+    """Дописывает span в JSON lines"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for s in spans:
+            f.write(json.dumps(s, ensure_ascii=False, default=str) + "\n")
+
+
+def slowest_table(spans, limit=10):
+    """Текстовая таблица самых долгих этапов за запуск"""
+    rows = sorted(spans, key=lambda s: s["duration"], reverse=True)[:limit]
+    lines = [f"⏱ Самые долгие этапы (из {len(spans)}):"]
+    for s in rows:
+        where = f"{s['company']}/{s['week']}" if s["company"] else "—"
+        tags = " ".join(f"{k}={v}" for k, v in s.get("tags", {}).items())
+        lines.append(f"  {s['duration']:8.3f} с  {s['name']:<10} {where:<28} {tags}".rstrip())
+    return "\n".join(lines)
+
+
+@contextmanager
+def profiled(out_path):
+    """cProfile блока в out_path (.prof, смотреть через python -m pstats / snakeviz)"""
+    import cProfile
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(out_path)
@@ -0,0 +1,148 @@
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+import importlib
+import os
+import signal
+import time
+
+from utils.build import run_job
+from utils.planner import plan_jobs, format_plan
+
+# Режим наблюдения (main.py --watch): папки data/<компания>/<неделя>/ опрашиваются
+# раз в несколько секунд, и неделя уходит в сборку, только когда её файлы
+# перестали меняться — иначе можно прочитать наполовину скопированный xlsx.
+
+# временные файлы копирования и открытого Excel: пока они есть, папка не готова
+TEMP_PREFIXES = ("~$", ".~")
+TEMP_SUFFIXES = (".tmp", ".part", ".crdownload", ".download", ".partial")
+
+# что воркер импортирует заранее (всё, что сборка недели тянет лениво)
+WARM_MODULES = ("pandas", "numpy", "openpyxl", "utils.dataset", "utils.pandas_part", "utils.detailed_pandas",
+                "utils.excel_formatting", "utils.detailed_excel_fromatting")
+
+
+def is_temp(name):
+    return name.startswith(TEMP_PREFIXES) or name.lower().endswith(TEMP_SUFFIXES)
+
+
+def signature(week_dir):
+    """Размеры и mtime файлов недели; None — идёт копирование (есть временные файлы)"""
+    files = {}
+    try:
+        entries = list(os.scandir(week_dir))
+    except FileNotFoundError:
+        return None
+    for entry in entries:
+        if not entry.is_file():
+            continue
+        if is_temp(entry.name):
+            return None
+        if entry.name.lower().endswith(".xlsx"):
+            st = entry.stat()
+            files[entry.name] = (st.st_size, st.st_mtime_ns)
+    return tuple(sorted(files.items()))
+
+
+@dataclass
+class FolderWatcher:
+    """Какие папки недель готовы к сборке.
+
+    Папка готова, когда её сигнатура (signature) не менялась settle секунд.
+    Готовая папка отдаётся один раз; снова — только после изменения файлов.
+    """
+    settle: float = 5.0
+    _pending: dict = field(default_factory=dict)  # папка → (сигнатура, с какого момента не меняется)
+    _done: dict = field(default_factory=dict)     # папка → сигнатура, с которой она уже отдана
+
+    def ready(self, week_dirs, busy=(), now=None):
+        """Папки из week_dirs, которые стали стабильными; busy — ещё собираются,
+        их изменения дождутся конца сборки"""
+        now = time.monotonic() if now is None else now
+        ready = []
+        for week_dir in week_dirs:
+            sig = signature(week_dir)
+            if sig is None:
+                self._pending.pop(week_dir, None)
+                continue
+            if self._done.get(week_dir) == sig:
+                self._pending.pop(week_dir, None)
+                continue
+            seen = self._pending.get(week_dir)
+            if seen is None or seen[0] != sig:
+                self._pending[week_dir] = (sig, now)
+                continue
+            if now - seen[1] >= self.settle and week_dir not in busy:
+                ready.append(week_dir)
+                self._done[week_dir] = sig
+                del self._pending[week_dir]
+        return ready
+
+
+def warm_worker(renderer="matplotlib"):
+    """Инициализатор процесса пула в режиме наблюдения: тяжёлые импорты,
+    шрифты matplotlib и курс — один раз при старте, а не на каждой неделе"""
+    from utils.currency import get_provider
+
+    # Ctrl+C получает родитель: он дождётся недель в работе и закроет пул сам
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+    if renderer == "matplotlib":
+        import matplotlib
+        matplotlib.use("Agg")
+        importlib.import_module("matplotlib.pyplot")
+        from matplotlib import font_manager
+        font_manager.findfont("DejaVu Sans")
+    try:
+        get_provider().rate()
+    except RuntimeError:
+        pass  # сборка недели сама сообщит, что курса нет
+
+
+def worker_ready():
+    """Пустая задача: дождаться, пока процесс пула поднят и прогрет"""
+    return os.getpid()
+
+
+def _report(job, err):
+    print(f"❌ {job.data_path}:\n{err}" if err is not None else f"✅ Неделя {job.name} собрана")
+
+
+def watch(data_root, reports_root, workers, options, filters, poll=2.0, settle=5.0):
+    """Следит за data/ и собирает недели, как только их файлы перестали
+    меняться (settle секунд). Сборки идут в пуле прогретых процессов
+    (warm_worker), так что новая неделя не платит за импорт pandas/matplotlib.
+    options — BuildOptions, filters — WeekFilter. Ctrl+C — дождаться недель в
+    работе и выйти."""
+    from utils.currency import get_provider
+
+    watcher = FolderWatcher(settle)
+    running = {}  # future → WeekJob
+    try:
+        get_provider().rate()  # воркеры возьмут курс из кэша на диске
+    except RuntimeError:
+        pass
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_worker, initargs=(options.renderer,)) as pool:
+        wait([pool.submit(worker_ready) for _ in range(workers)])
+        print(f"👀 Слежу за {data_root}/: опрос раз в {poll:g} с, неделя собирается через {settle:g} с "
+              f"после последнего изменения; воркеров — {workers}. Ctrl+C — выход")
+        try:
+            while True:
+                for future in [f for f in running if f.done()]:
+                    job, err, _ = future.result()
+                    del running[future]
+                    _report(job, err)
+
+                busy = {job.data_path for job in running.values()}
+                ready = watcher.ready(filters.discover(data_root), busy)
+                if ready:
+                    jobs = plan_jobs(ready, data_root, reports_root, options)
+                    if jobs:
+                        print(format_plan(jobs))
+                    for job in jobs:
+                        running[pool.submit(run_job, job)] = job
+                time.sleep(poll)
+        except KeyboardInterrupt:
+            print(f"Останавливаюсь: недель в работе — {len(running)}")
+            for future in wait(running).done:
+                _report(*future.result()[:2])